@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# netplanner
+# Copyright (C) 2021-2023 Deutsche Telekom AG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Benchmark of the configuration file formats.
+
+A configuration of interfaces ethernets, VLANs and bonds is generated as
+YAML and converted to JSON and, if the msgpack extra is installed, to
+msgpack, as by netplanner convert. Every file is then parsed like
+ConfigLoader does and has to give the same document as the YAML file.
+
+    python benchmarks/config_formats.py [--interfaces 10000] [--runs 3]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from netplanner.loader import formats  # noqa: E402
+
+
+def generated(interfaces: int) -> dict:
+    return {
+        "network": {
+            "version": 2,
+            "ethernets": {
+                f"eth{i}": {
+                    "mtu": 9000,
+                    "addresses": [f"10.{i // 256 % 256}.{i % 256}.1/24"],
+                    "match": {
+                        "macaddress": f"02:00:00:00:{i // 256 % 256:02x}:{i % 256:02x}"
+                    },
+                }
+                for i in range(interfaces)
+            },
+            "vlans": {
+                f"vlan{i}": {"id": 10, "link": f"eth{i}", "mtu": 1500}
+                for i in range(interfaces)
+            },
+            "bonds": {
+                f"bond{i}": {
+                    "interfaces": [f"eth{i}", f"eth{i + 1}"],
+                    "parameters": {"mode": "802.3ad", "lacp-rate": "fast"},
+                }
+                for i in range(0, interfaces, 2)
+            },
+        }
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--interfaces", type=int, default=10000)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    failed = False
+    with tempfile.TemporaryDirectory() as directory:
+        source = Path(directory) / "config.yaml"
+        with open(source, "w") as file:
+            yaml.dump(generated(args.interfaces), file, Dumper=yaml.SafeDumper)
+        paths = [source]
+        for name, suffix in formats.CONVERT_FORMATS.items():
+            try:
+                paths.append(formats.convert(source, source.with_suffix(suffix)))
+            except Exception as e:
+                print(f"skip {name}: {e}")
+        expected = None
+        for path in paths:
+            timings = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                document = formats.parse(path)
+                timings.append(time.perf_counter() - start)
+            if expected is None:
+                expected = document
+            same = document == expected
+            failed = failed or not same
+            print(
+                f"{'ok  ' if same else 'FAIL'} {path.suffix:<9} {min(timings):7.3f}s, "
+                f"{path.stat().st_size / 1024:6.0f} KiB"
+            )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
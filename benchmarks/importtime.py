@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# netplanner
+# Copyright (C) 2021-2023 Deutsche Telekom AG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Import-time budget of the boot critical netplanner subcommands.
+
+Every subcommand is run with python -X importtime. It fails if a forbidden
+module is imported, or if the import time, the sum of the self times of all
+imported modules in the fastest of all runs, exceeds its budget.
+
+    python benchmarks/importtime.py [--runs 5] [--scale 1.0]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+CONFIG = ROOT / "examples" / "vm-config.yaml"
+HEAVY = ["jinja2", "yaml", "dacite", "fqdn", "netplanner.config"]
+
+
+def scenarios(output: str) -> list[tuple[str, list[str], list[str], float]]:
+    """Name, arguments, forbidden modules and budget in milliseconds"""
+    config = ["--no-daemon", "--no-cache", "--config", str(CONFIG)]
+    return [
+        ("--version", ["--version"], HEAVY, 200),
+        (
+            "status",
+            ["--socket", f"{output}/none.sock", "status"],
+            HEAVY + ["importlib.metadata"],
+            150,
+        ),
+        (
+            "rebind",
+            ["--no-daemon", "rebind", "--timeout", "0", "0000:ff:1f.7"],
+            HEAVY + ["importlib.metadata", "netplanner.loader.config"],
+            150,
+        ),
+        (
+            "--only-sriov configure",
+            config + ["--only-sriov", "configure"],
+            ["jinja2"],
+            350,
+        ),
+        (
+            "--only-networkd configure",
+            config + ["--only-networkd", "--output", output, "configure"],
+            [],
+            450,
+        ),
+    ]
+
+
+def import_times(arguments: list[str]) -> dict[str, int]:
+    """Self import time in microseconds of every module imported by netplanner"""
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "netplanner"] + arguments,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        cwd=ROOT,
+        env=dict(os.environ, PYTHONPATH=str(ROOT)),
+    )
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, _, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = int(own)
+    return times
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="Factor applied to all budgets."
+    )
+    args = parser.parse_args()
+    failed = False
+    with tempfile.TemporaryDirectory() as output:
+        for name, arguments, forbidden, budget in scenarios(output):
+            runs = [import_times(arguments) for _ in range(args.runs)]
+            fastest = min(sum(times.values()) for times in runs) / 1000
+            imported = sorted(
+                module
+                for module in runs[0]
+                if any(
+                    module == prefix or module.startswith(prefix + ".")
+                    for prefix in forbidden
+                )
+            )
+            ok = not imported and fastest <= budget * args.scale
+            failed = failed or not ok
+            print(
+                f"{'ok  ' if ok else 'FAIL'} {name:<26} {fastest:7.1f} ms "
+                f"(budget {budget * args.scale:.0f} ms, {len(runs[0])} modules)"
+            )
+            if imported:
+                print(f"     forbidden imports: {', '.join(imported)}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# netplanner
+# Copyright (C) 2021-2023 Deutsche Telekom AG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Benchmark of the memory held by the configuration models.
+
+The raw configuration of interfaces ethernets with gateway4 and gateway6
+and of interfaces VLANs with one route each is generated first, then the
+memory allocated by NetplannerConfig.from_dict is traced with tracemalloc.
+With --baseline, the same measurement also runs against the models of a
+git revision, checked out into a temporary worktree, e.g. f137d9a, the
+revision before the models were slotted and shared their defaults.
+
+    python benchmarks/model_memory.py [--interfaces 20000] [--baseline REV]
+
+Recorded with --interfaces 20000 --baseline f137d9a (Python 3.11):
+
+    f137d9a  40000 interfaces: retained 80.2 MiB, 2102 B/interface
+    HEAD     40000 interfaces: retained 48.5 MiB, 1273 B/interface
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Run in a fresh process with the tree to measure on PYTHONPATH.
+CHILD = """
+import gc, json, sys, time, tracemalloc
+from netplanner.config import NetplannerConfig
+
+def generated(interfaces):
+    return {
+        "network": {
+            "version": 2,
+            "ethernets": {
+                f"eth{i}": {
+                    "addresses": [f"10.{i // 256 % 256}.{i % 256}.1/24"],
+                    "gateway4": "10.255.255.254",
+                    "gateway6": "fd00::1",
+                }
+                for i in range(interfaces)
+            },
+            "vlans": {
+                f"vlan{i}": {
+                    "id": 10,
+                    "link": f"eth{i}",
+                    "routes": [{"to": "192.168.0.0/16", "via": "10.255.255.253"}],
+                }
+                for i in range(interfaces)
+            },
+        }
+    }
+
+data = generated(int(sys.argv[1]))
+# Parse once untraced, so that caches of the converter are warm.
+NetplannerConfig.from_dict(generated(1))
+gc.collect()
+tracemalloc.start()
+start = time.perf_counter()
+configuration = NetplannerConfig.from_dict(data)
+seconds = time.perf_counter() - start
+gc.collect()
+retained, peak = tracemalloc.get_traced_memory()
+tracemalloc.stop()
+print(json.dumps({
+    "interfaces": len(configuration.network.ethernets) + len(configuration.network.vlans),
+    "retained": retained,
+    "peak": peak,
+    "seconds": seconds,
+}))
+"""
+
+
+def measure(root: Path, interfaces: int) -> dict:
+    process = subprocess.run(
+        [sys.executable, "-c", CHILD, str(interfaces)],
+        stdout=subprocess.PIPE,
+        check=True,
+        text=True,
+        cwd=root,
+        env=dict(os.environ, PYTHONPATH=str(root)),
+    )
+    return json.loads(process.stdout)
+
+
+def report(name: str, result: dict):
+    interfaces = result["interfaces"]
+    print(
+        f"{name:<8} {interfaces} interfaces: "
+        f"retained {result['retained'] / 2**20:.1f} MiB, "
+        f"{result['retained'] / interfaces:.0f} B/interface, "
+        f"peak {result['peak'] / 2**20:.1f} MiB, {result['seconds']:.2f}s (traced)"
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--interfaces", type=int, default=20000)
+    parser.add_argument(
+        "--baseline", help="Git revision whose models are measured as well."
+    )
+    args = parser.parse_args()
+    if args.baseline is not None:
+        with tempfile.TemporaryDirectory() as directory:
+            worktree = Path(directory) / "baseline"
+            subprocess.run(
+                ["git", "worktree", "add", "--detach", str(worktree), args.baseline],
+                check=True,
+                cwd=ROOT,
+                stdout=subprocess.DEVNULL,
+            )
+            try:
+                report(args.baseline, measure(worktree, args.interfaces))
+            finally:
+                subprocess.run(
+                    ["git", "worktree", "remove", "--force", str(worktree)],
+                    check=True,
+                    cwd=ROOT,
+                )
+    report("HEAD", measure(ROOT, args.interfaces))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
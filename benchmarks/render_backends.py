@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# netplanner
+# Copyright (C) 2021-2023 Deutsche Telekom AG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Golden test and benchmark of the networkd render backends.
+
+Every file of every configuration in examples/ (and of the given
+configurations) has to be the same byte for byte with the Jinja templates
+and the native emitter. Then both backends render a generated
+configuration, without writing the files.
+
+    python benchmarks/render_backends.py [--interfaces 2000] [--runs 3] [config ...]
+"""
+
+import argparse
+import difflib
+import logging
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from netplanner.config import NetplannerConfig  # noqa: E402
+from netplanner.loader.config import ConfigLoader  # noqa: E402
+from netplanner.providers.networkd.provider import NetworkdProvider  # noqa: E402
+
+
+def generated(interfaces: int) -> NetplannerConfig:
+    """Configuration of interfaces ethernets, bonds, bridges, dummies, vxlans and vlans"""
+    return NetplannerConfig.from_dict(
+        {
+            "network": {
+                "version": 2,
+                "ethernets": {f"eth{i}": {} for i in range(interfaces)},
+                "bonds": {
+                    f"bond{i}": {
+                        "interfaces": [f"eth{i}"],
+                        "parameters": {"mode": "active-backup"},
+                    }
+                    for i in range(interfaces)
+                },
+                "bridges": {
+                    f"br{i}": {"interfaces": [f"bond{i}", f"vx{i}"], "parameters": {}}
+                    for i in range(interfaces)
+                },
+                "dummies": {f"d{i}": {} for i in range(interfaces)},
+                "vxlans": {
+                    f"vx{i}": {
+                        "link": f"d{i}",
+                        "parameters": {"vni": i + 1, "local": "10.0.0.1"},
+                    }
+                    for i in range(interfaces)
+                },
+                "vlans": {
+                    f"vl{i}": {"id": 10, "link": f"bond{i}"} for i in range(interfaces)
+                },
+            }
+        }
+    )
+
+
+def render(configuration: NetplannerConfig, backend: str) -> dict[str, str]:
+    provider = NetworkdProvider(config=configuration, local=False, backend=backend)
+    return {
+        file_name: data.decode("utf-8")
+        for file_name, data in provider.render_to_mapping().items()
+    }
+
+
+def compare(name: str, configuration: NetplannerConfig) -> int:
+    jinja = render(configuration, "jinja")
+    native = render(configuration, "native")
+    mismatches = 0
+    for file_name, expected in jinja.items():
+        if native[file_name] == expected:
+            continue
+        mismatches += 1
+        print(f"FAIL {name}/{file_name}")
+        sys.stdout.writelines(
+            difflib.unified_diff(
+                expected.splitlines(True),
+                native[file_name].splitlines(True),
+                "jinja",
+                "native",
+            )
+        )
+        print()
+    print(f"{'ok  ' if not mismatches else 'FAIL'} {name}: {len(jinja)} files")
+    return mismatches
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--interfaces", type=int, default=2000)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("configs", nargs="*", type=Path)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    mismatches = 0
+    for path in sorted((ROOT / "examples").iterdir()) + args.configs:
+        try:
+            configuration = ConfigLoader(str(path)).load_netplanner_config()
+        except Exception as e:
+            print(f"skip {path.name}: {e}")
+            continue
+        mismatches += compare(path.name, configuration)
+    configuration = generated(args.interfaces)
+    mismatches += compare(f"generated {args.interfaces}", configuration)
+    for backend in NetworkdProvider.BACKENDS:
+        timings = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            files = render(configuration, backend)
+            timings.append(time.perf_counter() - start)
+        print(f"{backend:<6} {min(timings):6.2f}s for {len(files)} files")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# netplanner
+# Copyright (C) 2021-2023 Deutsche Telekom AG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Benchmark of the template startup with and without precompiled templates.
+
+Every run is a fresh process which imports the networkd provider and loads
+all networkd templates and the delayed-rebind template, once from the
+modules precompiled by python -m netplanner.loader.templates and once
+compiled from source. The files rendered from examples/ have to be the same
+byte for byte in both modes.
+
+    python benchmarks/templates.py [--runs 10]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Run by every child process, argv[1] is "precompiled" or "source".
+CHILD = """
+import hashlib, json, logging, sys, time
+from pathlib import Path
+
+start = time.perf_counter()
+import netplanner.loader.templates as loader
+if sys.argv[1] == "source":
+    loader.compiled_path = lambda module: None
+from netplanner.providers.networkd import templates
+from netplanner.providers.networkd.provider import NetworkdProvider
+from netplanner.sriov.__main__ import template_env
+
+for name in loader.ImportLibLoader(templates).template_names():
+    NetworkdProvider.env.get_template(name)
+template_env().get_template("netplanner-delayed-rebind.j2")
+seconds = time.perf_counter() - start
+
+from netplanner.loader.config import ConfigLoader
+
+logging.disable(logging.INFO)
+digest = hashlib.sha256()
+for path in sorted(Path("examples").iterdir()):
+    try:
+        configuration = ConfigLoader(str(path)).load_netplanner_config()
+    except Exception:
+        continue
+    provider = NetworkdProvider(config=configuration, local=False)
+    for file_name, data in sorted(provider.render_to_mapping().items()):
+        digest.update(file_name.encode() + data)
+print(json.dumps({
+    "seconds": seconds,
+    "precompiled": isinstance(NetworkdProvider.env.loader, loader.PrecompiledLoader),
+    "digest": digest.hexdigest(),
+}))
+"""
+
+
+def run(mode: str) -> dict:
+    process = subprocess.run(
+        [sys.executable, "-c", CHILD, mode],
+        stdout=subprocess.PIPE,
+        check=True,
+        text=True,
+        cwd=ROOT,
+        env=dict(os.environ, PYTHONPATH=str(ROOT)),
+    )
+    return json.loads(process.stdout)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+    if not run("precompiled")["precompiled"]:
+        print("Precompiling the templates (python -m netplanner.loader.templates)")
+        subprocess.run(
+            [sys.executable, "-m", "netplanner.loader.templates"],
+            stdout=subprocess.DEVNULL,
+            check=True,
+            cwd=ROOT,
+            env=dict(os.environ, PYTHONPATH=str(ROOT)),
+        )
+    digests = set()
+    for mode in ["precompiled", "source"]:
+        runs = [run(mode) for _ in range(args.runs)]
+        digests |= {result["digest"] for result in runs}
+        print(f"{mode:<11} {min(r['seconds'] for r in runs) * 1000:7.1f} ms")
+    if len(digests) != 1:
+        print("FAIL the rendered examples differ between the modes")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
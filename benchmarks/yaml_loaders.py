@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# netplanner
+# Copyright (C) 2021-2023 Deutsche Telekom AG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Benchmark of the YAML loaders.
+
+A YAML configuration of interfaces ethernets, VLANs and bonds, with anchors
+and merge keys, is generated and loaded with safe_load, with libyaml (if
+PyYAML was built with it) and with the streaming loader on top of both. All
+loaders have to return the same document. The peak memory of every loader
+is traced with tracemalloc in a separate run.
+
+    python benchmarks/yaml_loaders.py [--interfaces 10000] [--runs 3]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable
+
+import yaml
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from netplanner.loader import stream  # noqa: E402
+
+DEFAULTS = """\
+defaults:
+  ethernet: &ethernet
+    mtu: 9000
+    emit-lldp: true
+    link-local: [ipv6]
+"""
+
+
+def generate(path: Path, interfaces: int):
+    """Writes a configuration whose ethernets merge a shared anchor"""
+    with open(path, "w") as file:
+        file.write(DEFAULTS)
+        file.write("network:\n  version: 2\n  ethernets:\n")
+        for i in range(interfaces):
+            file.write(
+                f"    eth{i}:\n"
+                f"      <<: *ethernet\n"
+                f"      addresses: [10.{i // 256 % 256}.{i % 256}.1/24]\n"
+                f"      match: {{macaddress: '02:00:00:00:{i // 256 % 256:02x}:{i % 256:02x}'}}\n"
+            )
+        file.write("  vlans:\n")
+        for i in range(interfaces):
+            file.write(f"    vlan{i}: {{id: 10, link: eth{i}, mtu: 1500}}\n")
+        file.write("  bonds:\n")
+        for i in range(0, interfaces, 2):
+            file.write(
+                f"    bond{i}:\n"
+                f"      interfaces: [eth{i}, eth{i + 1}]\n"
+                f"      parameters: {{mode: 802.3ad, lacp-rate: fast}}\n"
+            )
+
+
+def python_streaming(file) -> Any:
+    loader = stream.SafeLoader
+    stream.SafeLoader = yaml.SafeLoader
+    try:
+        return stream.load_streaming(file)
+    finally:
+        stream.SafeLoader = loader
+
+
+def loaders() -> dict[str, Callable[[Any], Any]]:
+    results: dict[str, Callable[[Any], Any]] = {"safe_load": yaml.safe_load}
+    if stream.SafeLoader is not yaml.SafeLoader:
+        results["libyaml"] = stream.load
+        results["streaming, libyaml"] = stream.load_streaming
+    results["streaming, python"] = python_streaming
+    return results
+
+
+def load(path: Path, loader: Callable[[Any], Any]) -> Any:
+    with open(path, "r") as file:
+        return loader(file)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--interfaces", type=int, default=10000)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    failed = False
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "config.yaml"
+        generate(path, args.interfaces)
+        print(f"{path.stat().st_size / 1024:.0f} KiB, {args.interfaces} ethernets")
+        expected = None
+        for name, loader in loaders().items():
+            timings = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                document = load(path, loader)
+                timings.append(time.perf_counter() - start)
+            if expected is None:
+                expected = document
+            del document
+            tracemalloc.start()
+            same = load(path, loader) == expected
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            failed = failed or not same
+            print(
+                f"{'ok  ' if same else 'FAIL'} {name:<20} {min(timings):6.2f}s, "
+                f"peak {peak / 2**20:5.1f} MiB"
+            )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,10 +14,22 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import importlib.metadata
+from functools import cache
 
-try:
-    # This will read version from pyproject.toml
-    __version__ = importlib.metadata.version(__name__)
-except Exception:
-    __version__ = "develop"
+
+@cache
+def version() -> str:
+    # importlib.metadata is expensive to import, only do so when asked.
+    import importlib.metadata
+
+    try:
+        # This will read version from pyproject.toml
+        return importlib.metadata.version(__name__)
+    except Exception:
+        return "develop"
+
+
+def __getattr__(name: str):
+    if name == "__version__":
+        return version()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -15,59 +15,128 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import argparse
+import json
 import logging
+import signal
+import sys
+from pathlib import Path
 from time import gmtime
 
-from . import __version__
-from .config import NetplannerConfig
-from .loader.config import ConfigLoader
-from .providers.networkd.provider import NetworkdProvider
-from .sriov.__main__ import config as sriov
-from .sriov.__main__ import rebind
-
-DEFAULT_OUTPUT_PATH = "/etc/systemd/network"
-NETPLAN_DEFAULT_OUTPUT_PATH = "/run/systemd/network"
-
-# https://stackoverflow.com/a/7517430/49489
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s.%(msecs)03dZ level=%(levelname)s module=%(name)s message="%(message)s"',
-    datefmt="%Y-%m-%dT%H:%M:%S",
-)
-logging.addLevelName(logging.DEBUG, "debug")
-logging.addLevelName(logging.INFO, "info")
-logging.addLevelName(logging.WARNING, "warning")
-logging.addLevelName(logging.ERROR, "error")
-logging.addLevelName(logging.CRITICAL, "critical")
-logging.Formatter.converter = gmtime
-
-
-def configure(
-    configuration: NetplannerConfig,
-    output: str,
-    local: bool,
-    reload: bool,
-    only_sriov: bool,
-    only_networkd: bool,
-):
-    provider = NetworkdProvider(config=configuration, local=local, path=output)
-    if not only_sriov and not only_networkd:
-        sriov(configuration)
-        provider.render()
-        if reload:
-            provider.networkd(restart=True)
-            provider.networkctl(reload=True)
-    elif only_sriov:
-        sriov(configuration, queue_rebind=True)
-    elif only_networkd:
-        provider.render()
-        if reload:
-            provider.networkd(restart=True)
-            provider.networkctl(reload=True)
+# Only what the argument parser needs is imported here, every subcommand
+# imports its own dependencies, see benchmarks/importtime.py.
+from .client import SOCKET_PATH, DaemonUnavailable, request
+from .loader.cache import ConfigCache
+from .loader.formats import CONVERT_FORMATS
+from .sriov.rebind import REBIND_TIMEOUT
+
+
+def setup_logging():
+    # https://stackoverflow.com/a/7517430/49489
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s.%(msecs)03dZ level=%(levelname)s module=%(name)s message="%(message)s"',
+        datefmt="%Y-%m-%dT%H:%M:%S",
+    )
+    logging.addLevelName(logging.DEBUG, "debug")
+    logging.addLevelName(logging.INFO, "info")
+    logging.addLevelName(logging.WARNING, "warning")
+    logging.addLevelName(logging.ERROR, "error")
+    logging.addLevelName(logging.CRITICAL, "critical")
+    logging.Formatter.converter = gmtime
+
+
+class VersionAction(argparse.Action):
+    """Like the version action, but reads the version only when it is requested"""
+
+    def __init__(self, option_strings, dest=argparse.SUPPRESS, help=None):
+        super().__init__(
+            option_strings, dest, default=argparse.SUPPRESS, nargs=0, help=help
+        )
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        from . import version
+
+        print(version())
+        parser.exit()
+
+
+def forward(args: argparse.Namespace) -> bool:
+    """Forwards the command to a running netplanner daemon, returns False if it has to run in this process"""
+    # The daemon loads the configuration with its own settings and logs at
+    # its own level, these options are only honoured in this process.
+    if (
+        args.debug
+        or args.no_cache
+        or args.streaming_loader
+        or args.config_workers != 1
+        or args.cache_dir != str(ConfigCache.DEFAULT_CACHE_DIR)
+    ):
+        logging.debug("Running in this process because of the given options")
+        return False
+    socket_path = Path(args.socket)
+    if not socket_path.exists():
+        return False
+    from . import version
+
+    config = None if args.config is None else str(Path(args.config).resolve())
+    match args.command:
+        case ("configure" | "apply" | "generate"):
+            # Relative output paths are only meaningful in this process.
+            if args.local:
+                return False
+            arguments = dict(
+                config=config,
+                output=args.output,
+                reload=bool(args.reload),
+                only_sriov=bool(args.only_sriov),
+                only_networkd=bool(args.only_networkd),
+                sriov_workers=args.sriov_workers,
+                sriov_device=args.sriov_device,
+                render_workers=args.render_workers,
+                render_cache=not args.no_render_cache,
+                render_backend=args.render_backend,
+            )
+            result = request(
+                "configure", socket_path, client_version=version(), **arguments
+            )
+        case "rebind":
+            result = request(
+                "rebind",
+                socket_path,
+                client_version=version(),
+                pci_addresses=args.pci_addresses,
+                timeout=args.timeout,
+                driver=args.driver,
+            )
+        case _:
+            return False
+    logging.info(f"Served by the netplanner daemon at {socket_path}: {result}")
+    return True
+
+
+def serve(args: argparse.Namespace):
+    from .daemon import Daemon
+
+    daemon = Daemon(
+        Path(args.socket),
+        cache_dir=None if args.no_cache else Path(args.cache_dir),
+        streaming=bool(args.streaming_loader),
+        workers=args.config_workers,
+    )
+    # Leaves serve_forever through SystemExit, so that the socket is removed.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    with daemon:
+        try:
+            daemon.configuration(args.config)
+        except Exception as e:
+            logging.error(f"Cannot preload the configuration: {e}")
+        logging.info(f"netplanner daemon listening on {args.socket}")
+        daemon.serve_forever()
 
 
 def main():
     """Main entry point for netplanner"""
+    setup_logging()
     parser = argparse.ArgumentParser("netplanner")
     parser.set_defaults(prog=parser.prog)
     subparsers = parser.add_subparsers(
@@ -76,7 +145,11 @@ def main():
         help="sub-command help",
         dest="command",
     )
-    parser.add_argument("--version", action="version", version=__version__)
+    parser.add_argument(
+        "--version",
+        help="show program's version number and exit",
+        action=VersionAction,
+    )
     parser.add_argument(
         "--config",
         help="Defines the path to the configuration file or directory.",
@@ -116,6 +189,76 @@ def main():
         help="The output directory to which the files will be written.",
         default=None,
     )
+    parser.add_argument(
+        "--sriov-workers",
+        help="The number of SR-IOV PFs which are configured in parallel.",
+        type=int,
+        default=1,
+        dest="sriov_workers",
+    )
+    parser.add_argument(
+        "--sriov-device",
+        help="With --only-sriov, this only configures the SR-IOV PF with this interface name or PCI address, concurrent calls are coalesced.",
+        default=None,
+        dest="sriov_device",
+    )
+    parser.add_argument(
+        "--render-workers",
+        help="The number of processes which render the networkd files in parallel.",
+        type=int,
+        default=1,
+        dest="render_workers",
+    )
+    parser.add_argument(
+        "--no-render-cache",
+        help="This renders every networkd file, instead of reusing the files rendered from the same interfaces in the output directory.",
+        action="store_true",
+        dest="no_render_cache",
+    )
+    parser.add_argument(
+        "--render-backend",
+        help="Renders the networkd files with the Jinja templates or with the native emitter, which writes the same files faster.",
+        # NetworkdProvider.BACKENDS, which would import Jinja.
+        choices=["jinja", "native"],
+        default="jinja",
+        dest="render_backend",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="The directory in which the validated configuration is cached.",
+        default=str(ConfigCache.DEFAULT_CACHE_DIR),
+        dest="cache_dir",
+    )
+    parser.add_argument(
+        "--no-cache",
+        help="This disables the configuration cache.",
+        action="store_true",
+        dest="no_cache",
+    )
+    parser.add_argument(
+        "--streaming-loader",
+        help="This builds the configuration directly from the YAML events, without an intermediate document tree.",
+        action="store_true",
+        dest="streaming_loader",
+    )
+    parser.add_argument(
+        "--config-workers",
+        help="The number of configuration files which are parsed and pre-validated in parallel.",
+        type=int,
+        default=1,
+        dest="config_workers",
+    )
+    parser.add_argument(
+        "--socket",
+        help="The Unix socket of the netplanner daemon.",
+        default=str(SOCKET_PATH),
+    )
+    parser.add_argument(
+        "--no-daemon",
+        help="This runs the command in this process, even if a netplanner daemon is running.",
+        action="store_true",
+        dest="no_daemon",
+    )
     subparsers.add_parser(
         "configure",
         help="Configure Network Adapters flawlessly with the knowledge of the netplanner.",
@@ -135,8 +278,41 @@ def main():
         nargs="+",
         help="PCI addresses of PFs to rebind VFs of",
     )
+    rebind_parser.add_argument(
+        "--timeout",
+        help="Seconds to wait for the lag of each PF to become active.",
+        type=float,
+        default=REBIND_TIMEOUT,
+    )
+    rebind_parser.add_argument(
+        "--driver",
+        help="The driver to bind the VFs to via driver_override, mlx5_core without override if unset.",
+        default=None,
+    )
+    convert_parser = subparsers.add_parser(
+        "convert",
+        help="Convert the configuration files into a format which loads faster than YAML.",
+    )
+    convert_parser.add_argument(
+        "destination",
+        help="Directory to which the converted configuration files are written.",
+    )
+    convert_parser.add_argument(
+        "--format",
+        help="The format to convert the configuration files to.",
+        choices=sorted(CONVERT_FORMATS),
+        # msgpack is an optional dependency.
+        default="json",
+    )
+    subparsers.add_parser(
+        "serve",
+        help="Serve configure, render, rebind and status requests on the daemon socket.",
+    )
+    subparsers.add_parser("status", help="Show the status of the netplanner daemon")
 
     args = parser.parse_args()
+    if args.sriov_device is not None and not args.only_sriov:
+        parser.error("--sriov-device requires --only-sriov")
 
     try:
         if args.debug:
@@ -145,31 +321,56 @@ def main():
                 f"logger is now in LogLevel {logging.getLevelName(logging.getLogger().level)}"
             )
 
-        loader = ConfigLoader(args.config)
-        if loader.load_config():
-            logging.debug(loader.config)
-            configuration = NetplannerConfig.from_dict(loader.config)
-        else:
-            raise Exception("Configuration cannot be loaded.")
-        output_path = args.output
-        if output_path is None:
-            if loader.is_netplan:
-                output_path = NETPLAN_DEFAULT_OUTPUT_PATH
-            else:
-                output_path = DEFAULT_OUTPUT_PATH
+        if args.command == "status":
+            print(json.dumps(request("status", Path(args.socket)), indent=2))
+            return
+        if args.command == "serve":
+            serve(args)
+            return
+        if not args.no_daemon:
+            try:
+                if forward(args):
+                    return
+            except DaemonUnavailable as e:
+                logging.debug(e)
+        if args.command == "rebind":
+            from .sriov.rebind import rebind
+
+            rebind(args.pci_addresses, timeout=args.timeout, driver=args.driver)
+            return
+
+        from .commands import configure, output_path
+        from .loader.config import ConfigLoader
+
+        cache = None if args.no_cache else ConfigCache(Path(args.cache_dir))
+        loader = ConfigLoader(
+            args.config,
+            cache=cache,
+            streaming=bool(args.streaming_loader),
+            workers=args.config_workers,
+        )
+        configuration = loader.load_netplanner_config()
         ## Python 3.10
         match args.command:
             case ("configure" | "apply" | "generate"):
                 configure(
                     configuration,
-                    output_path,
+                    output_path(args.output, loader.is_netplan),
                     local=bool(args.local),
                     reload=bool(args.reload),
                     only_sriov=bool(args.only_sriov),
                     only_networkd=bool(args.only_networkd),
+                    sriov_workers=args.sriov_workers,
+                    sriov_device=args.sriov_device,
+                    render_workers=args.render_workers,
+                    render_cache=not args.no_render_cache,
+                    render_backend=args.render_backend,
                 )
-            case "rebind":
-                rebind(args.pci_addresses)
+            case "convert":
+                for path in loader.convert(
+                    Path(args.destination), CONVERT_FORMATS[args.format]
+                ):
+                    logging.info(f"Converted configuration to {path}")
             case _:
                 raise Exception(
                     f"Unknown subcommand: {'<empty>' if args.command is None else args.command}"
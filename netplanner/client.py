@@ -0,0 +1,72 @@
+# netplanner
+# Copyright (C) 2021-2023 Deutsche Telekom AG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import socket
+from pathlib import Path
+from typing import Any, Optional
+
+# Only the standard library is imported here, the client has to stay cheap.
+SOCKET_PATH = Path("/run/netplanner/netplanner.sock")
+
+
+class DaemonUnavailable(Exception):
+    pass
+
+
+def request(
+    command: str,
+    socket_path: Path = SOCKET_PATH,
+    client_version: Optional[str] = None,
+    **arguments,
+) -> Any:
+    """Sends a request to the netplanner daemon and returns its result
+
+    The protocol is a single line of JSON in each direction per connection.
+
+    :param command: configure, render, rebind or status
+    :type: str
+    :param socket_path: Unix socket the daemon listens on
+    :type: Path
+    :param client_version: version the daemon has to run to serve the request
+    :type: Optional[str]
+    :raises DaemonUnavailable: if no daemon accepts the connection, or it
+        runs another version
+    :returns: the result of the request
+    :rtype: Any
+    """
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(str(socket_path))
+    except OSError as e:
+        connection.close()
+        raise DaemonUnavailable(f"No netplanner daemon at {socket_path}: {e}")
+    with connection, connection.makefile("rwb") as stream:
+        message: dict[str, Any] = {"command": command, "arguments": arguments}
+        if client_version is not None:
+            message["version"] = client_version
+        stream.write(json.dumps(message).encode() + b"\n")
+        stream.flush()
+        line = stream.readline()
+    if not line:
+        raise Exception("The netplanner daemon closed the connection")
+    response = json.loads(line)
+    if "error" in response:
+        if "version" in response:
+            # The daemon was not restarted after an upgrade.
+            raise DaemonUnavailable(response["error"])
+        raise Exception(response["error"])
+    return response.get("result")
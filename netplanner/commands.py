@@ -0,0 +1,119 @@
+# netplanner
+# Copyright (C) 2021-2023 Deutsche Telekom AG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+from typing import TYPE_CHECKING, Optional
+
+from .config import NetplannerConfig
+from .sriov import pci
+from .sriov.__main__ import config as sriov
+from .sriov.trigger import coalesce
+
+if TYPE_CHECKING:
+    from .providers.networkd.provider import RenderChanges
+
+DEFAULT_OUTPUT_PATH = "/etc/systemd/network"
+NETPLAN_DEFAULT_OUTPUT_PATH = "/run/systemd/network"
+
+
+def output_path(output: Optional[str], is_netplan: bool) -> str:
+    if output is not None:
+        return output
+    if is_netplan:
+        return NETPLAN_DEFAULT_OUTPUT_PATH
+    return DEFAULT_OUTPUT_PATH
+
+
+def render(
+    configuration: NetplannerConfig,
+    output: str,
+    local: bool,
+    reload: bool,
+    workers: int = 1,
+    render_cache: bool = True,
+    backend: str = "jinja",
+) -> "RenderChanges":
+    # Jinja is only imported when networkd is rendered.
+    from .providers.networkd.provider import NetworkdProvider
+
+    provider = NetworkdProvider(
+        config=configuration,
+        local=local,
+        path=output,
+        workers=workers,
+        render_cache=render_cache,
+        backend=backend,
+    )
+    changes = provider.render()
+    if reload and changes:
+        provider.apply_reload(provider.plan_reload(changes))
+    elif reload:
+        logging.info("networkd configuration is unchanged, skipping reload")
+    return changes
+
+
+def configure(
+    configuration: NetplannerConfig,
+    output: str,
+    local: bool,
+    reload: bool,
+    only_sriov: bool,
+    only_networkd: bool,
+    sriov_workers: int = 1,
+    sriov_device: Optional[str] = None,
+    devices: Optional[pci.PCINetDevices] = None,
+    render_workers: int = 1,
+    render_cache: bool = True,
+    render_backend: str = "jinja",
+) -> Optional["RenderChanges"]:
+    """Configures SR-IOV and renders networkd, returns the networkd changes if rendered"""
+    if sriov_device is not None and not only_sriov:
+        raise Exception("sriov_device requires only_sriov")
+    if not only_sriov and not only_networkd:
+        sriov(configuration, workers=sriov_workers, devices=devices)
+        return render(
+            configuration,
+            output,
+            local,
+            reload,
+            workers=render_workers,
+            render_cache=render_cache,
+            backend=render_backend,
+        )
+    elif only_sriov and sriov_device is not None:
+        coalesce(
+            sriov_device,
+            lambda only: sriov(
+                configuration,
+                queue_rebind=True,
+                workers=sriov_workers,
+                only=only,
+                devices=devices,
+            ),
+        )
+    elif only_sriov:
+        sriov(configuration, queue_rebind=True, workers=sriov_workers, devices=devices)
+    elif only_networkd:
+        return render(
+            configuration,
+            output,
+            local,
+            reload,
+            workers=render_workers,
+            render_cache=render_cache,
+            backend=render_backend,
+        )
+    return None
@@ -15,6 +15,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from dataclasses import dataclass, field, fields
+from functools import cached_property
 from typing import Dict, List, OrderedDict, Union
 
 from .interfaces.base import Base
@@ -27,6 +28,7 @@ from .interfaces.l2.vlan import VLAN
 from .interfaces.l2.vrf import VRF
 from .interfaces.l2.vxlan import VXLAN
 from .interfaces.typing import InterfaceName, NetworkRenderer, Version
+from .topology import Topology
 
 
 @dataclass
@@ -56,6 +58,10 @@ class NetworkConfig(Base):
             if key == name
         }
 
+    @cached_property
+    def topology(self) -> Topology:
+        return Topology(self)
+
     def __post_init__(self):
         for interface_name, interface_config in self.veths.items():
             if interface_config.link not in self.veths:
@@ -69,6 +75,8 @@ class NetworkConfig(Base):
                     f"Link of Veth {interface_name} does not have the same link"
                 )
         self.veths = OrderedDict(sorted(self.veths.items()))
+        # Built once after validation, also rejects ambiguous topologies early.
+        self.topology
 
 
 @dataclass
@@ -0,0 +1,257 @@
+# netplanner
+# Copyright (C) 2021-2023 Deutsche Telekom AG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+import time
+from functools import partial
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+from . import version
+from .client import SOCKET_PATH
+from .commands import configure, output_path, render
+from .config import NetplannerConfig
+from .loader.cache import ConfigCache, Fingerprint
+from .loader.config import ConfigLoader
+from .sriov import pci
+from .sriov.__main__ import config as sriov
+from .sriov.rebind import REBIND_TIMEOUT, rebind
+from .sriov.trigger import coalesce
+
+# First file descriptor passed by systemd socket activation, see sd_listen_fds(3).
+SD_LISTEN_FDS_START = 3
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    server: "Daemon"
+
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            message = json.loads(line)
+            expected = message.get("version")
+            if expected is not None and expected != version():
+                self.server.logger.warning(
+                    f"Refusing a request of netplanner {expected}, restart the daemon"
+                )
+                response = {
+                    "error": f"The netplanner daemon runs version {version()}, not {expected}",
+                    "version": version(),
+                }
+                self.wfile.write(json.dumps(response).encode() + b"\n")
+                return
+            response = {
+                "result": self.server.dispatch(
+                    message["command"], message.get("arguments", {})
+                )
+            }
+        except Exception as e:
+            self.server.logger.error(f"Request {line!r} failed: {e}")
+            response = {"error": str(e)}
+        self.wfile.write(json.dumps(response).encode() + b"\n")
+
+
+class Daemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Long-running netplanner which serves configure, render, rebind and status
+    requests on a Unix socket.
+
+    The validated configuration of every requested config path is kept until
+    its files change, the compiled templates stay loaded and the SR-IOV
+    inventory is refreshed instead of being rebuilt. configure and render
+    requests are handled one at a time, rebind and status concurrently.
+    Requests of udev triggers for single SR-IOV PFs wait for further
+    triggers concurrently, and are configured in a single pass.
+    """
+
+    logger = logging.getLogger("daemon")
+    daemon_threads = True
+
+    def __init__(
+        self,
+        socket_path: Path = SOCKET_PATH,
+        cache_dir: Optional[Path] = ConfigCache.DEFAULT_CACHE_DIR,
+        streaming: bool = False,
+        workers: int = 1,
+    ):
+        super().__init__(str(socket_path), RequestHandler, bind_and_activate=False)
+        self.socket_path = socket_path
+        self.cache_dir = cache_dir
+        self.streaming = streaming
+        self.workers = workers
+        self.started = time.monotonic()
+        self.requests = 0
+        self.lock = threading.Lock()
+        self._configurations: dict[
+            Optional[str], tuple[tuple[Fingerprint, ...], NetplannerConfig, bool]
+        ] = {}
+        self._devices: Optional[pci.PCINetDevices] = None
+        self.activated = self._listen_fds() > 0
+        if self.activated:
+            self.socket.close()
+            self.socket = socket.socket(fileno=SD_LISTEN_FDS_START)
+        else:
+            try:
+                self.socket_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+                self.socket_path.unlink(missing_ok=True)
+                self.server_bind()
+                os.chmod(self.socket_path, 0o600)
+                self.server_activate()
+            except BaseException:
+                self.server_close()
+                raise
+
+    @staticmethod
+    def _listen_fds() -> int:
+        if os.environ.get("LISTEN_PID") != str(os.getpid()):
+            return 0
+        return int(os.environ.get("LISTEN_FDS", "0"))
+
+    def server_close(self):
+        super().server_close()
+        if not self.activated:
+            self.socket_path.unlink(missing_ok=True)
+
+    def configuration(self, config: Optional[str]) -> tuple[NetplannerConfig, bool]:
+        """Returns the validated configuration, reloaded only if its files changed"""
+        if config is not None:
+            config = str(Path(config).resolve())
+        cache = ConfigCache(self.cache_dir) if self.cache_dir is not None else None
+        loader = ConfigLoader(
+            config, cache=cache, streaming=self.streaming, workers=self.workers
+        )
+        fingerprints = loader.fingerprints
+        warm = self._configurations.get(config)
+        if warm is not None and warm[0] == fingerprints:
+            return warm[1], warm[2]
+        self.logger.info(f"Loading configuration {loader.path}")
+        configuration = loader.load_netplanner_config()
+        self._configurations[config] = (fingerprints, configuration, loader.is_netplan)
+        return configuration, loader.is_netplan
+
+    def inventory(self, names: Iterable[str] = ()) -> pci.PCINetDevices:
+        """Returns the refreshed SR-IOV inventory, rescanned if a device of names is unknown to it"""
+        devices = self._devices
+        if devices is not None and any(
+            devices.get_device_from_interface_name(name) is None
+            and devices.get_device_from_pci_address(name) is None
+            for name in names
+        ):
+            devices = None
+        if devices is None:
+            devices = pci.PCINetDevices()
+        else:
+            devices.update_devices()
+        self._devices = devices
+        return devices
+
+    def configure_sriov(self, arguments: dict, only: set[str]):
+        """Configures the SR-IOV PFs of a single pass of coalesced udev triggers"""
+        with self.lock:
+            configuration, _ = self.configuration(arguments.get("config"))
+            sriov(
+                configuration,
+                queue_rebind=True,
+                workers=int(arguments.get("sriov_workers", 1)),
+                only=only,
+                devices=self.inventory(only),
+            )
+
+    def dispatch(self, command: str, arguments: dict) -> Any:
+        self.requests += 1
+        self.logger.info(f"Request {command} {arguments}")
+        match command:
+            case "configure" if arguments.get("only_sriov") and arguments.get(
+                "sriov_device"
+            ):
+                # The trigger is queued and debounced without holding the lock,
+                # so that concurrent triggers are coalesced into a single pass.
+                coalesce(
+                    arguments["sriov_device"], partial(self.configure_sriov, arguments)
+                )
+                return None
+            case "configure":
+                with self.lock:
+                    configuration, is_netplan = self.configuration(
+                        arguments.get("config")
+                    )
+                    only_networkd = bool(arguments.get("only_networkd"))
+                    sriov_configured = any(
+                        ethernet.virtual_function_count is not None
+                        for ethernet in configuration.network.ethernets.values()
+                    )
+                    changes = configure(
+                        configuration,
+                        output_path(arguments.get("output"), is_netplan),
+                        local=False,
+                        reload=bool(arguments.get("reload")),
+                        only_sriov=bool(arguments.get("only_sriov")),
+                        only_networkd=only_networkd,
+                        sriov_workers=int(arguments.get("sriov_workers", 1)),
+                        render_workers=int(arguments.get("render_workers", 1)),
+                        render_cache=bool(arguments.get("render_cache", True)),
+                        render_backend=arguments.get("render_backend", "jinja"),
+                        sriov_device=arguments.get("sriov_device"),
+                        devices=self.inventory()
+                        if sriov_configured and not only_networkd
+                        else None,
+                    )
+                return None if changes is None else str(changes)
+            case "render":
+                with self.lock:
+                    configuration, is_netplan = self.configuration(
+                        arguments.get("config")
+                    )
+                    changes = render(
+                        configuration,
+                        output_path(arguments.get("output"), is_netplan),
+                        local=False,
+                        reload=bool(arguments.get("reload")),
+                        workers=int(arguments.get("render_workers", 1)),
+                        render_cache=bool(arguments.get("render_cache", True)),
+                        backend=arguments.get("render_backend", "jinja"),
+                    )
+                return str(changes)
+            case "rebind":
+                rebind(
+                    list(arguments["pci_addresses"]),
+                    timeout=float(arguments.get("timeout", REBIND_TIMEOUT)),
+                    driver=arguments.get("driver"),
+                )
+                return None
+            case "status":
+                return {
+                    "version": version(),
+                    "pid": os.getpid(),
+                    "uptime": round(time.monotonic() - self.started, 3),
+                    "requests": self.requests,
+                    "socket_activated": self.activated,
+                    "configurations": sorted(
+                        str(config) for config in self._configurations
+                    ),
+                    "sriov_devices": None
+                    if self._devices is None
+                    else len(self._devices.pci_devices),
+                }
+            case _:
+                raise Exception(f"Unknown request: {command}")
@@ -14,7 +14,8 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from dataclasses import asdict, dataclass
+import logging
+from dataclasses import dataclass, fields, is_dataclass
 from enum import Enum
 from ipaddress import (
     IPv4Address,
@@ -32,6 +33,7 @@ from typing import Optional, OrderedDict, Union
 import dacite
 from fqdn import FQDN as UpstreamFQDN  # type: ignore
 
+from .converter import Converter
 from .typing import (
     ESwitchMode,
     IPInterfaceAddresses,
@@ -47,15 +49,80 @@ from .typing import (
     VirtualFunctionCount,
     VLANId,
     VLANType,
+    interned,
+    validation_cache,
 )
 
 
+@interned
 class FQDN(UpstreamFQDN):
+    def __new__(cls, *args, **kwargs):
+        return super().__new__(cls)
+
     def __str__(self):
         return self.relative
 
 
-@dataclass
+cached_ip_address = validation_cache("ip_address", ip_address)
+cached_ip_interface = validation_cache("ip_interface", ip_interface)
+cached_ip_network = validation_cache("ip_network", ip_network)
+
+CONFIG = dacite.Config(
+    cast=[
+        Enum,
+        FQDN,
+        InterfaceName,
+        MacAddress,
+        VirtualFunctionCount,
+        ESwitchMode,
+        PositiveInt,
+        UnsignedShortInt,
+        TableShortInt,
+        RouteType,
+        RouteScope,
+        LinkLocalAdressing,
+        OrderedDict,
+        MTU,
+        frozenset,
+        IPv4Network,
+        IPv6Network,
+        IPv4Interface,
+        IPv6Interface,
+        IPv4Address,
+        IPv6Address,
+        VLANType,
+        VLANId,
+    ],
+    check_types=True,
+    strict=True,
+    strict_unions_match=True,
+    type_hooks={
+        IPInterfaceAddresses: lambda x: [cached_ip_interface(y) for y in x],
+        IPv4Network: cached_ip_network,
+        IPv6Network: cached_ip_network,
+        IPv4Address: cached_ip_address,
+        IPv6Address: cached_ip_address,
+    },
+)
+
+# The IP types are casted again after the type hooks, intern these as well.
+CONVERTER = Converter(
+    CONFIG,
+    constructors={
+        ip_type: validation_cache(ip_type.__name__, ip_type)
+        for ip_type in [
+            IPv4Network,
+            IPv6Network,
+            IPv4Interface,
+            IPv6Interface,
+            IPv4Address,
+            IPv6Address,
+        ]
+    },
+)
+
+
+@dataclass(slots=True)
 class BaseSerializer:
     @staticmethod
     def RESERVED() -> list[str]:
@@ -86,26 +153,40 @@ class BaseSerializer:
         new_char: str = "_",
         ignore_levels: list = [2],
     ) -> dict:
-        keys = list(dictionary.keys())
-        for key in keys:
-            sanitized_key = BaseSerializer.get_streamlined_key(
-                key,
-                level=level,
-                old_char=old_char,
-                new_char=new_char,
-                ignore_levels=ignore_levels,
-            )
-            match dictionary[key]:
-                case dict():
-                    dictionary[sanitized_key] = BaseSerializer.streamline_keys(
-                        dictionary[key],
-                        level=level + 1,
-                        old_char=old_char,
-                        new_char=new_char,
-                        ignore_levels=ignore_levels,
+        """
+        Renames the keys of the nested dictionaries in place, in a single pass
+        which keeps the key order. Lists are not descended into.
+        """
+        get_streamlined_key = BaseSerializer.get_streamlined_key
+        reserved = BaseSerializer.RESERVED()
+        stack = [(dictionary, level)]
+        seen = set()
+        while stack:
+            current, depth = stack.pop()
+            # YAML anchors may share a dictionary, rename it only once.
+            if id(current) in seen:
+                continue
+            seen.add(id(current))
+            replace = depth not in ignore_levels
+            items = []
+            renamed = False
+            for key, value in current.items():
+                if (
+                    key in reserved
+                    or key.startswith("_")
+                    or (replace and old_char in key)
+                ):
+                    sanitized_key = get_streamlined_key(
+                        key, depth, old_char, new_char, ignore_levels
                     )
-                case _:
-                    dictionary[sanitized_key] = dictionary.pop(key)
+                    renamed = renamed or sanitized_key != key
+                    key = sanitized_key
+                items.append((key, value))
+                if isinstance(value, dict):
+                    stack.append((value, depth + 1))
+            if renamed:
+                current.clear()
+                current.update(items)
         return dictionary
 
     @staticmethod
@@ -123,7 +204,7 @@ class BaseSerializer:
     @staticmethod
     def to_complex_serializable(data) -> Union[list, dict, int, str]:
         match data:
-            case list() | set():
+            case list() | set() | frozenset():
                 return [BaseSerializer.to_complex_serializable(item) for item in data]
             case dict():
                 return {
@@ -151,60 +232,76 @@ class BaseSerializer:
             if cls.__name__ == "NetplannerConfig"
             else data
         )
-        return dacite.from_dict(
-            data_class=cls,
-            data=data,
-            config=dacite.Config(
-                cast=[
-                    Enum,
-                    FQDN,
-                    InterfaceName,
-                    MacAddress,
-                    VirtualFunctionCount,
-                    ESwitchMode,
-                    PositiveInt,
-                    UnsignedShortInt,
-                    TableShortInt,
-                    RouteType,
-                    RouteScope,
-                    LinkLocalAdressing,
-                    OrderedDict,
-                    MTU,
-                    set,
-                    IPv4Network,
-                    IPv6Network,
-                    IPv4Interface,
-                    IPv6Interface,
-                    IPv4Address,
-                    IPv6Address,
-                    VLANType,
-                    VLANId,
-                ],
-                check_types=True,
-                strict=True,
-                strict_unions_match=True,
-                type_hooks={
-                    IPInterfaceAddresses: lambda x: [ip_interface(y) for y in x],
-                    IPv4Network: ip_network,
-                    IPv6Network: ip_network,
-                    IPv4Address: ip_address,
-                    IPv6Address: ip_address,
-                },
-            ),
-        )
+        try:
+            return CONVERTER.from_dict(cls, data)
+        except dacite.DaciteError as e:
+            # dacite stays the reference implementation, it reports the error
+            # with the full field path.
+            logging.getLogger("converter").debug(
+                f"{cls.__name__} is parsed again by dacite: {e}"
+            )
+            return cls.from_dict_reference(data)
+
+    @classmethod
+    def from_dict_reference(cls, data: dict):
+        return dacite.from_dict(data_class=cls, data=data, config=CONFIG)
+
+    @staticmethod
+    def _to_primitive(value, level: int, rename: bool, stack: list):
+        """
+        Returns the primitive of value. Dataclasses, dicts and collections are
+        returned empty and queued on the stack to be filled by as_dict.
+        """
+        if isinstance(value, dict) or (
+            is_dataclass(value) and not isinstance(value, type)
+        ):
+            container: Union[dict, list] = {}
+        elif isinstance(value, (list, set, frozenset)):
+            container = []
+            rename = False
+        else:
+            return BaseSerializer.to_serializable(value)
+        stack.append((value, container, level, rename))
+        return container
 
     def as_dict(self):
-        return BaseSerializer.streamline_keys(
-            asdict(self, dict_factory=BaseSerializer.dict_factory),
-            old_char="_",
-            new_char="-",
-        )
+        """
+        Serializes to primitives in a single pass without an intermediate
+        copy, with the same keys as streamline_keys(asdict(self), "_", "-").
+        """
+        stack: list = []
+        result = BaseSerializer._to_primitive(self, 0, True, stack)
+        while stack:
+            source, target, level, rename = stack.pop()
+            if isinstance(target, list):
+                target.extend(
+                    BaseSerializer._to_primitive(item, level + 1, False, stack)
+                    for item in source
+                )
+                continue
+            if isinstance(source, dict):
+                items = (
+                    (BaseSerializer.to_serializable(key), value)
+                    for key, value in source.items()
+                )
+            else:
+                items = (
+                    (field.name, getattr(source, field.name))
+                    for field in fields(source)
+                )
+            for key, value in items:
+                if rename:
+                    key = BaseSerializer.get_streamlined_key(key, level, "_", "-", [2])
+                target[key] = BaseSerializer._to_primitive(
+                    value, level + 1, rename, stack
+                )
+        return result
 
     @property
     def object_name(self) -> str:
         return self.__class__.__name__
 
 
-@dataclass
+@dataclass(slots=True)
 class Base(BaseSerializer):
     description: Optional[str]
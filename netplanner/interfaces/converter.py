@@ -0,0 +1,308 @@
+# netplanner
+# Copyright (C) 2021-2023 Deutsche Telekom AG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from collections.abc import Collection, Mapping
+from dataclasses import MISSING, is_dataclass
+from typing import Any, Callable, Optional, TypeVar
+
+import dacite
+
+# Internals of dacite, which is therefore pinned to ~1.9 in pyproject.toml.
+from dacite.core import _build_value_for_collection
+from dacite.dataclasses import is_frozen
+from dacite.exceptions import (
+    MissingValueError,
+    StrictUnionMatchError,
+    UnexpectedDataError,
+    UnionMatchError,
+    WrongTypeError,
+)
+from dacite.generics import get_concrete_type_hints, get_fields, orig
+from dacite.types import (
+    extract_generic,
+    extract_init_var,
+    extract_new_type,
+    extract_origin_collection,
+    is_generic_collection,
+    is_init_var,
+    is_instance,
+    is_new_type,
+    is_optional,
+    is_subclass,
+    is_union,
+)
+
+T = TypeVar("T")
+
+Build = Callable[[Any], Any]
+Check = Callable[[Any], bool]
+
+
+def _identity(data: Any) -> Any:
+    return data
+
+
+def _always(value: Any) -> bool:
+    return True
+
+
+class Converter:
+    """
+    Compiled equivalent of dacite.from_dict for a fixed dacite.Config.
+
+    The type hints of every dataclass are introspected once and turned into a
+    tree of closures, which apply the type hooks, casts, type checks and strict
+    key checks in the same order as dacite does. Constructs which are not used
+    by the models (tuples, literals, ...) are delegated to dacite itself.
+    """
+
+    def __init__(
+        self, config: dacite.Config, constructors: Optional[dict[Any, Build]] = None
+    ):
+        self.config = config
+        # Replacements for casts to a type, e.g. to intern its values.
+        self.constructors = constructors or {}
+        self._builders: dict[Any, Build] = {}
+        self._checks: dict[Any, Check] = {}
+        self._classes: dict[Any, Build] = {}
+
+    def from_dict(self, data_class: type[T], data: Mapping) -> T:
+        return self._class(data_class)(data)
+
+    def _class(self, data_class: Any) -> Build:
+        if data_class not in self._classes:
+            self._classes[data_class] = self._compile_class(data_class)
+        return self._classes[data_class]
+
+    def _compile_class(self, data_class: Any) -> Build:
+        config = self.config
+        hints = get_concrete_type_hints(
+            data_class, localns=config.hashable_forward_references
+        )
+        fields = get_fields(data_class)
+        names = {field.name for field in fields}
+        cls = orig(data_class)
+        frozen = is_frozen(cls)
+        specs = []
+        for field in fields:
+            field_type = hints[field.name]
+            specs.append(
+                (
+                    field,
+                    config.convert_key(field.name),
+                    field_type,
+                    self._builder(field_type),
+                    self._check(field_type) if config.check_types else _always,
+                    is_optional(field_type),
+                )
+            )
+
+        def build(data: Mapping) -> Any:
+            if config.strict:
+                extra_fields = set(data.keys()) - names
+                if extra_fields:
+                    raise UnexpectedDataError(keys=extra_fields)
+            init_values = {}
+            post_init_values = {}
+            for field, key, field_type, builder, check, optional in specs:
+                if key in data:
+                    value = builder(data[key])
+                    if not check(value):
+                        raise WrongTypeError(
+                            field_path=field.name, field_type=field_type, value=value
+                        )
+                elif field.default is not MISSING:
+                    value = field.default
+                elif field.default_factory is not MISSING:
+                    value = field.default_factory()
+                elif optional:
+                    value = None
+                elif not field.init:
+                    continue
+                else:
+                    raise MissingValueError(field.name)
+                if field.init:
+                    init_values[field.name] = value
+                elif not frozen:
+                    post_init_values[field.name] = value
+            instance = data_class(**init_values)
+            for name, value in post_init_values.items():
+                setattr(instance, name, value)
+            return instance
+
+        return build
+
+    def _builder(self, type_: Any) -> Build:
+        if type_ not in self._builders:
+            # Placeholder for recursive types, resolved on first call.
+            self._builders[type_] = lambda data: self._builders[type_](data)
+            self._builders[type_] = self._compile_builder(type_)
+        return self._builders[type_]
+
+    def _compile_builder(self, type_: Any) -> Build:
+        if is_init_var(type_):
+            type_ = extract_init_var(type_)
+        hook = self.config.type_hooks.get(type_)
+        optional = is_optional(type_)
+        inner: Build = _identity
+        if is_union(type_):
+            inner = self._union(type_)
+        elif is_generic_collection(type_):
+            inner = self._collection(type_)
+        elif is_dataclass(orig(type_)):
+            inner = self._dataclass(type_)
+        cast: Build = _identity
+        for cast_type in self.config.cast:
+            if is_subclass(type_, cast_type):
+                if is_generic_collection(type_):
+                    cast = extract_origin_collection(type_)
+                else:
+                    cast = self.constructors.get(type_, type_)
+                break
+
+        if hook is None and not optional:
+            if inner is _identity:
+                return cast
+            if cast is _identity:
+                return inner
+
+        def build(data: Any) -> Any:
+            if hook is not None:
+                data = hook(data)
+            if optional and data is None:
+                return data
+            return cast(inner(data))
+
+        return build
+
+    def _dataclass(self, type_: Any) -> Build:
+        def build(data: Any) -> Any:
+            if isinstance(data, Mapping):
+                return self._class(type_)(data)
+            return data
+
+        return build
+
+    def _union(self, union: Any) -> Build:
+        types = extract_generic(union)
+        if is_optional(union) and len(types) == 2:
+            return self._builder(types[0])
+        members = [
+            (inner_type, self._builder(inner_type), self._check(inner_type))
+            for inner_type in types
+        ]
+        strict_unions_match = self.config.strict_unions_match
+        check_types = self.config.check_types
+
+        def build(data: Any) -> Any:
+            union_matches = {}
+            for inner_type, builder, check in members:
+                try:
+                    value = builder(data)
+                except Exception:
+                    continue
+                if check(value):
+                    if not strict_unions_match:
+                        return value
+                    union_matches[inner_type] = value
+            if union_matches:
+                if len(union_matches) > 1:
+                    raise StrictUnionMatchError(union_matches)
+                return union_matches.popitem()[1]
+            if not check_types:
+                return data
+            raise UnionMatchError(field_type=union, value=data)
+
+        return build
+
+    def _collection(self, collection: Any) -> Build:
+        config = self.config
+        if is_subclass(collection, tuple):
+            return lambda data: _build_value_for_collection(collection, data, config)
+        mapping = is_subclass(collection, Mapping)
+        values: Build = _identity
+        if mapping:
+            values = self._builder(extract_generic(collection, defaults=(Any, Any))[1])
+        items = self._builder(extract_generic(collection, defaults=(Any,))[0])
+        iterable = is_subclass(collection, Collection)
+
+        def build(data: Any) -> Any:
+            data_type = data.__class__
+            if mapping and isinstance(data, Mapping):
+                return data_type((key, values(value)) for key, value in data.items())
+            if isinstance(data, tuple):
+                return _build_value_for_collection(collection, data, config)
+            if iterable and isinstance(data, Collection):
+                return data_type(items(item) for item in data)
+            return data
+
+        return build
+
+    def _check(self, type_: Any) -> Check:
+        if type_ not in self._checks:
+            self._checks[type_] = lambda value: self._checks[type_](value)
+            self._checks[type_] = self._compile_check(type_)
+        return self._checks[type_]
+
+    def _compile_check(self, type_: Any) -> Check:
+        if type_ in [float, complex]:
+            return lambda value: is_instance(value, type_)
+        try:
+            isinstance(None, type_)
+            instance_check = True
+        except TypeError:
+            instance_check = False
+        if type_ == Any:
+            return _always
+        rest: Check
+        if is_union(type_):
+            checks = [self._check(inner) for inner in extract_generic(type_)]
+            rest = lambda value: any(check(value) for check in checks)
+        elif is_generic_collection(type_):
+            rest = self._collection_check(type_)
+        elif is_new_type(type_):
+            rest = self._check(extract_new_type(type_))
+        elif isinstance(type_, type):
+            rest = lambda value: False
+        else:
+            return lambda value: is_instance(value, type_)
+        if not instance_check:
+            return rest
+        return lambda value: isinstance(value, type_) or rest(value)
+
+    def _collection_check(self, collection: Any) -> Check:
+        origin = extract_origin_collection(collection)
+        if not extract_generic(collection):
+            return lambda value: isinstance(value, origin)
+        if is_subclass(collection, tuple):
+            return lambda value: is_instance(value, collection)
+        keys: Check = _always
+        values: Check = _always
+        if is_subclass(collection, Mapping):
+            key_type, value_type = extract_generic(collection, defaults=(Any, Any))
+            keys, values = self._check(key_type), self._check(value_type)
+        items = self._check(extract_generic(collection, defaults=(Any,))[0])
+
+        def check(value: Any) -> bool:
+            if not isinstance(value, origin):
+                return False
+            if isinstance(value, tuple):
+                return is_instance(value, collection)
+            if isinstance(value, Mapping):
+                return all(keys(key) and values(val) for key, val in value.items())
+            return all(items(item) for item in value)
+
+        return check
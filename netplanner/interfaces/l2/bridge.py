@@ -15,13 +15,14 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from dataclasses import dataclass, field
-from typing import List, Optional, Set
+from typing import FrozenSet, List, Optional
 
 from ..base import Base
 from ..l3.nameserver import NameServers
 from ..l3.route import Route
 from ..l3.routing_policy import RoutingPolicy
 from ..typing import (
+    DEFAULT_LINK_LOCAL,
     MTU,
     InterfaceName,
     IPInterfaceAddresses,
@@ -32,7 +33,7 @@ from ..typing import (
 )
 
 
-@dataclass
+@dataclass(slots=True)
 class BridgeParameters(Base):
     ageing_time: Optional[int]
     vlan_protocol: Optional[VLANType]
@@ -60,14 +61,14 @@ class BridgeParameters(Base):
             )
 
 
-@dataclass
+@dataclass(slots=True)
 class Bridge(Base):
     parameters: BridgeParameters
     nameservers: Optional[NameServers]
     vrf: Optional[InterfaceName]
     mtu: Optional[MTU]
     macaddress: Optional[MacAddress]
-    link_local: Optional[Set[LinkLocalAdressing]]
+    link_local: Optional[FrozenSet[LinkLocalAdressing]]
     interfaces: List[InterfaceName] = field(default_factory=list)
     addresses: IPInterfaceAddresses = field(default_factory=list)
     routes: List[Route] = field(default_factory=list)
@@ -75,5 +76,4 @@ class Bridge(Base):
 
     def __post_init__(self):
         if self.link_local is None:
-            self.link_local = set()
-            self.link_local.add(LinkLocalAdressing("ipv6"))
+            self.link_local = DEFAULT_LINK_LOCAL
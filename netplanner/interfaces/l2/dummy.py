@@ -15,7 +15,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from dataclasses import dataclass, field
-from typing import List, Optional, Set
+from typing import FrozenSet, List, Optional
 
 from ..base import Base
 from ..l3.nameserver import NameServers
@@ -23,6 +23,7 @@ from ..l3.route import Route
 from ..l3.routing_policy import RoutingPolicy
 from ..match_object import MatchObject
 from ..typing import (
+    DEFAULT_LINK_LOCAL,
     MTU,
     InterfaceName,
     IPInterfaceAddresses,
@@ -31,14 +32,14 @@ from ..typing import (
 )
 
 
-@dataclass
+@dataclass(slots=True)
 class Dummy(Base):
     macaddress: Optional[MacAddress]
     optional: Optional[bool]
     nameservers: Optional[NameServers]
     match: Optional[MatchObject]
     mtu: Optional[MTU]
-    link_local: Optional[Set[LinkLocalAdressing]]
+    link_local: Optional[FrozenSet[LinkLocalAdressing]]
     vrf: Optional[InterfaceName]
     addresses: IPInterfaceAddresses = field(default_factory=list)
     routes: List[Route] = field(default_factory=list)
@@ -46,5 +47,4 @@ class Dummy(Base):
 
     def __post_init__(self):
         if self.link_local is None:
-            self.link_local = set()
-            self.link_local.add(LinkLocalAdressing("ipv6"))
+            self.link_local = DEFAULT_LINK_LOCAL
@@ -16,7 +16,7 @@
 
 from dataclasses import dataclass, field
 from ipaddress import IPv4Address, IPv6Address
-from typing import List, Optional, Set
+from typing import FrozenSet, List, Optional
 
 from ..base import Base
 from ..l3.nameserver import NameServers
@@ -24,6 +24,7 @@ from ..l3.route import Route
 from ..l3.routing_policy import RoutingPolicy
 from ..match_object import MatchObject
 from ..typing import (
+    DEFAULT_LINK_LOCAL,
     MTU,
     ESwitchMode,
     InterfaceName,
@@ -34,7 +35,7 @@ from ..typing import (
 )
 
 
-@dataclass
+@dataclass(slots=True)
 class Ethernet(Base):
     macaddress: Optional[MacAddress]
     optional: Optional[bool]
@@ -45,7 +46,8 @@ class Ethernet(Base):
     mtu: Optional[MTU]
     virtual_function_count: Optional[VirtualFunctionCount]
     embedded_switch_mode: Optional[ESwitchMode]
-    link_local: Optional[Set[LinkLocalAdressing]]
+    virtual_function_driver: Optional[str]
+    link_local: Optional[FrozenSet[LinkLocalAdressing]]
     accept_ra: Optional[bool]
     gateway4: Optional[IPv4Address]
     gateway6: Optional[IPv6Address]
@@ -59,39 +61,12 @@ class Ethernet(Base):
 
     def __post_init__(self):
         if self.link_local is None:
-            self.link_local = set()
-            self.link_local.add(LinkLocalAdressing("ipv6"))
+            self.link_local = DEFAULT_LINK_LOCAL
         if self.gateway4 is not None:
             self.routes.append(
-                Route(
-                    description="Default gateway set by gateway4",
-                    _from=None,
-                    to=None,
-                    type=None,
-                    via=self.gateway4,
-                    on_link=None,
-                    table=None,
-                    metric=None,
-                    scope=None,
-                    mtu=None,
-                    congestion_window=None,
-                    advertised_receive_window=None,
-                )
+                Route.default_gateway(self.gateway4, "Default gateway set by gateway4")
             )
         if self.gateway6 is not None:
             self.routes.append(
-                Route(
-                    description="Default gateway set by gateway6",
-                    _from=None,
-                    to=None,
-                    type=None,
-                    via=self.gateway6,
-                    on_link=None,
-                    table=None,
-                    metric=None,
-                    scope=None,
-                    mtu=None,
-                    congestion_window=None,
-                    advertised_receive_window=None,
-                )
+                Route.default_gateway(self.gateway6, "Default gateway set by gateway6")
             )
@@ -15,12 +15,13 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from dataclasses import dataclass, field
-from typing import List, Optional, Set
+from typing import FrozenSet, List, Optional
 
 from ..base import Base
 from ..l3.route import Route
 from ..l3.routing_policy import RoutingPolicy
 from ..typing import (
+    DEFAULT_LINK_LOCAL,
     MTU,
     InterfaceName,
     IPInterfaceAddresses,
@@ -29,13 +30,13 @@ from ..typing import (
 )
 
 
-@dataclass
+@dataclass(slots=True)
 class Veth(Base):
     link: InterfaceName
     optional: Optional[bool]
     macaddress: Optional[MacAddress]
     mtu: Optional[MTU]
-    link_local: Optional[Set[LinkLocalAdressing]]
+    link_local: Optional[FrozenSet[LinkLocalAdressing]]
     vrf: Optional[InterfaceName]
     addresses: IPInterfaceAddresses = field(default_factory=list)
     routes: List[Route] = field(default_factory=list)
@@ -43,5 +44,4 @@ class Veth(Base):
 
     def __post_init__(self):
         if self.link_local is None:
-            self.link_local = set()
-            self.link_local.add(LinkLocalAdressing("ipv6"))
+            self.link_local = DEFAULT_LINK_LOCAL
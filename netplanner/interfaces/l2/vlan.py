@@ -16,13 +16,14 @@
 
 from dataclasses import dataclass, field
 from ipaddress import IPv4Address, IPv6Address
-from typing import List, Optional, Set
+from typing import FrozenSet, List, Optional
 
 from ..base import Base
 from ..l3.nameserver import NameServers
 from ..l3.route import Route
 from ..l3.routing_policy import RoutingPolicy
 from ..typing import (
+    DEFAULT_LINK_LOCAL,
     MTU,
     InterfaceName,
     IPInterfaceAddresses,
@@ -33,7 +34,7 @@ from ..typing import (
 )
 
 
-@dataclass
+@dataclass(slots=True)
 class VLANParameters(Base):
     protocol: Optional[VLANType]
     gvrp: Optional[bool]
@@ -42,7 +43,7 @@ class VLANParameters(Base):
     reorder_header: Optional[bool]
 
 
-@dataclass
+@dataclass(slots=True)
 class VLAN(Base):
     id: VLANId
     link: InterfaceName
@@ -50,7 +51,7 @@ class VLAN(Base):
     parameters: Optional[VLANParameters]
     macaddress: Optional[MacAddress]
     nameservers: Optional[NameServers]
-    link_local: Optional[Set[LinkLocalAdressing]]
+    link_local: Optional[FrozenSet[LinkLocalAdressing]]
     vrf: Optional[InterfaceName]
     gateway4: Optional[IPv4Address]
     gateway6: Optional[IPv6Address]
@@ -60,39 +61,12 @@ class VLAN(Base):
 
     def __post_init__(self):
         if self.link_local is None:
-            self.link_local = set()
-            self.link_local.add(LinkLocalAdressing("ipv6"))
+            self.link_local = DEFAULT_LINK_LOCAL
         if self.gateway4 is not None:
             self.routes.append(
-                Route(
-                    description="Default gateway set by gateway4",
-                    _from=None,
-                    to=None,
-                    type=None,
-                    via=self.gateway4,
-                    on_link=None,
-                    table=None,
-                    metric=None,
-                    scope=None,
-                    mtu=None,
-                    congestion_window=None,
-                    advertised_receive_window=None,
-                )
+                Route.default_gateway(self.gateway4, "Default gateway set by gateway4")
             )
         if self.gateway6 is not None:
             self.routes.append(
-                Route(
-                    description="Default gateway set by gateway6",
-                    _from=None,
-                    to=None,
-                    type=None,
-                    via=self.gateway6,
-                    on_link=None,
-                    table=None,
-                    metric=None,
-                    scope=None,
-                    mtu=None,
-                    congestion_window=None,
-                    advertised_receive_window=None,
-                )
+                Route.default_gateway(self.gateway6, "Default gateway set by gateway6")
             )
@@ -15,12 +15,13 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from dataclasses import dataclass, field
-from typing import List, Optional, Set
+from typing import FrozenSet, List, Optional
 
 from ..base import Base
 from ..l3.nameserver import NameServers
 from ..l3.route import Route
 from ..typing import (
+    DEFAULT_LINK_LOCAL,
     MTU,
     InterfaceName,
     IPAddress,
@@ -31,7 +32,7 @@ from ..typing import (
 )
 
 
-@dataclass
+@dataclass(slots=True)
 class VXLANParameters(Base):
     vni: PositiveInt
     remote: Optional[IPAddress]
@@ -77,13 +78,13 @@ class VXLANParameters(Base):
             raise ValueError(f"VXLANParameters Tos={self.tos} not in 0 - 63")
 
 
-@dataclass
+@dataclass(slots=True)
 class VXLAN(Base):
     parameters: VXLANParameters
     nameservers: Optional[NameServers]
     mtu: Optional[MTU]
     link: InterfaceName
-    link_local: Optional[Set[LinkLocalAdressing]]
+    link_local: Optional[FrozenSet[LinkLocalAdressing]]
     macaddress: Optional[MacAddress]
     vrf: Optional[InterfaceName]
     addresses: IPInterfaceAddresses = field(default_factory=list)
@@ -91,8 +92,7 @@ class VXLAN(Base):
 
     def __post_init__(self):
         if self.link_local is None:
-            self.link_local = set()
-            self.link_local.add(LinkLocalAdressing("ipv6"))
+            self.link_local = DEFAULT_LINK_LOCAL
         if self.parameters.generate_mac:
             self.macaddress = self.parameters.generate_mac.set_ip_bytes(
                 self.parameters.local
@@ -21,7 +21,7 @@ from ..base import FQDN, Base
 from ..typing import IPAddress
 
 
-@dataclass
+@dataclass(slots=True)
 class NameServers(Base):
     search: List[FQDN] = field(default_factory=list)
     addresses: List[IPAddress] = field(default_factory=list)
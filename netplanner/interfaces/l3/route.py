@@ -23,7 +23,7 @@ from ..typing import IPAddress, IPNetwork, TableShortInt
 from ..typing import RouteScope, RouteType
 
 
-@dataclass
+@dataclass(slots=True)
 class Route(Base):
     _from: Optional[IPNetwork]
     to: Optional[IPNetwork]
@@ -42,3 +42,21 @@ class Route(Base):
             raise ValueError(
                 f"Route OnLink={self.on_link} or Gateway={self.via} need to be specified."
             )
+
+    @staticmethod
+    def default_gateway(via: IPAddress, description: str) -> "Route":
+        """Route to a default gateway, a new instance for every interface"""
+        return Route(
+            description=description,
+            _from=None,
+            to=None,
+            type=None,
+            via=via,
+            on_link=None,
+            table=None,
+            metric=None,
+            scope=None,
+            mtu=None,
+            congestion_window=None,
+            advertised_receive_window=None,
+        )
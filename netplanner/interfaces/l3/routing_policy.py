@@ -21,7 +21,7 @@ from ..base import Base, PositiveInt
 from ..typing import IPNetwork, TableShortInt, UnsignedShortInt
 
 
-@dataclass
+@dataclass(slots=True)
 class RoutingPolicy(Base):
     _from: Optional[IPNetwork]
     to: Optional[IPNetwork]
@@ -21,7 +21,7 @@ from .base import Base
 from .typing import InterfaceName, MacAddress
 
 
-@dataclass
+@dataclass(slots=True)
 class MatchObject(Base):
     name: Optional[InterfaceName]
     macaddress: Optional[MacAddress]
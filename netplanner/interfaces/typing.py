@@ -14,8 +14,10 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import copy
 import re
 from enum import Enum
+from functools import lru_cache, wraps
 from ipaddress import (
     IPv4Address,
     IPv4Interface,
@@ -24,12 +26,76 @@ from ipaddress import (
     IPv6Interface,
     IPv6Network,
 )
-from typing import List, Union
+from typing import Any, Callable, List, TypeVar, Union
 
 IPInterfaceAddresses = List[Union[IPv4Interface, IPv6Interface]]
 IPNetwork = Union[IPv4Network, IPv6Network]
 IPAddress = Union[IPv4Address, IPv6Address]
 
+T = TypeVar("T")
+
+VALIDATION_CACHE_SIZE = 4096
+VALIDATION_CACHES: dict[str, Callable] = {}
+
+
+class _Invalid:
+    def __init__(self, error: ValueError):
+        self.error = error
+
+
+def validation_cache(name: str, create: Callable[..., T]) -> Callable[..., T]:
+    """
+    Wraps the constructor of an immutable value in an LRU bounded cache.
+
+    Repeated, hashable input returns the same validated instance, or raises a
+    copy of the same ValueError. Unhashable input is passed to create on every
+    call, so errors stay the same.
+    """
+
+    @lru_cache(maxsize=VALIDATION_CACHE_SIZE, typed=True)
+    def cached(*args, **kwargs) -> Union[T, _Invalid]:
+        try:
+            return create(*args, **kwargs)
+        except ValueError as error:
+            return _Invalid(error.with_traceback(None))
+
+    @wraps(create)
+    def validate(*args, **kwargs) -> T:
+        try:
+            value = cached(*args, **kwargs)
+        except TypeError:
+            return create(*args, **kwargs)
+        if isinstance(value, _Invalid):
+            raise copy.copy(value.error)
+        return value
+
+    validate.cache_info = cached.cache_info  # type: ignore[attr-defined]
+    VALIDATION_CACHES[name] = validate
+    return validate
+
+
+def validation_cache_info() -> dict[str, Any]:
+    """Hits and misses of every validation cache, see functools.lru_cache"""
+    return {
+        name: cache.cache_info()  # type: ignore[attr-defined]
+        for name, cache in VALIDATION_CACHES.items()
+    }
+
+
+def interned(cls: type[T]) -> type[T]:
+    """Interns the validated instances of cls, see validation_cache"""
+    uncached = cls.__new__
+    cached = validation_cache(cls.__name__, uncached)
+
+    def __new__(klass, *args, **kwargs):
+        # Subclasses calling super().__new__ and unpickling are not interned.
+        if klass is not cls or not args:
+            return uncached(klass, *args, **kwargs)
+        return cached(klass, *args, **kwargs)
+
+    cls.__new__ = staticmethod(__new__)  # type: ignore[assignment]
+    return cls
+
 
 class Version(Enum):
     THIRD = 3
@@ -69,6 +135,7 @@ class BondLACPRate(Enum):
     FAST = "fast"
 
 
+@interned
 class MTU(int):
     def __new__(cls, value: int):
         if not (1280 <= value <= 9166):
@@ -76,6 +143,7 @@ class MTU(int):
         return super().__new__(cls, value)
 
 
+@interned
 class PositiveInt(int):
     def __new__(cls, value: int):
         if not value > 0:
@@ -83,6 +151,7 @@ class PositiveInt(int):
         return super().__new__(cls, value)
 
 
+@interned
 class UnsignedShortInt(PositiveInt):
     def __new__(cls, value: int):
         if value > 255:
@@ -90,6 +159,7 @@ class UnsignedShortInt(PositiveInt):
         return super().__new__(cls, value)
 
 
+@interned
 class TableShortInt(UnsignedShortInt):
     reserved = {255: "local", 254: "main", 253: "default", 0: "unspec"}
 
@@ -101,6 +171,7 @@ class TableShortInt(UnsignedShortInt):
         return super().__new__(cls, value)
 
 
+@interned
 class InterfaceName(str):
     __supertype__ = str
 
@@ -112,6 +183,7 @@ class InterfaceName(str):
         return super().__new__(cls, content)
 
 
+@interned
 class LinkLocalAdressing(str):
     __supertype__ = str
 
@@ -121,11 +193,16 @@ class LinkLocalAdressing(str):
         return super().__new__(cls, content)
 
 
+# Shared by every interface without an explicit link_local, never mutated.
+DEFAULT_LINK_LOCAL = frozenset({LinkLocalAdressing("ipv6")})
+
+
 class VLANType(Enum):
     Q1802 = "802.1q"
     AD1802 = "802.1ad"
 
 
+@interned
 class VLANId(int):
     def __new__(cls, value: int):
         if value and not (2 <= value <= 4094):
@@ -133,6 +210,7 @@ class VLANId(int):
         return super().__new__(cls, value)
 
 
+@interned
 class VirtualFunctionCount(int):
     def __new__(cls, value: int):
         if not (0 <= value <= 255):
@@ -140,6 +218,7 @@ class VirtualFunctionCount(int):
         return super().__new__(cls, value)
 
 
+@interned
 class MacAddress(str):
     __supertype__ = str
     hex_re = re.compile(r"^[\da-f]+$")
@@ -149,9 +228,10 @@ class MacAddress(str):
             raise ValueError(
                 f"MacAddress {content} of len {len(content)} not supported in Linux"
             )
-        if len(content.split(":")) != 6:
+        octets = content.split(":")
+        if len(octets) != 6:
             raise ValueError(f"MacAddress {content} has not enough : or to many.")
-        if not all([MacAddress.hex_re.match(item) for item in content.split(":")]):
+        if not all(MacAddress.hex_re.match(octet) for octet in octets):
             raise ValueError(f"MacAddress {content} malformed.")
 
         return str.__new__(cls, content)
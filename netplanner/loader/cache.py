@@ -0,0 +1,133 @@
+# netplanner
+# Copyright (C) 2021-2023 Deutsche Telekom AG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from .. import version
+
+Fingerprint = tuple[str, int, int, str]
+
+
+class ConfigCache:
+    """
+    On-disk cache of parsed configuration layers and the validated configuration.
+
+    Every entry is keyed by the fingerprint (path, mtime, size, sha256) of the
+    configuration files it was built from and the netplanner version.
+    The cache file is only ever read and written by root (mode 0600) as it
+    contains pickled objects.
+    """
+
+    logger = logging.getLogger("config_cache")
+    DEFAULT_CACHE_DIR = Path("/run/netplanner")
+    CACHE_FILE = "config.cache"
+
+    def __init__(self, path: Path = DEFAULT_CACHE_DIR):
+        self.path: Path = path
+        self._layers: dict[Fingerprint, bytes] = {}
+        self._config: Optional[tuple[tuple[Fingerprint, ...], bytes]] = None
+        self._used_layers: set[Fingerprint] = set()
+        self._dirty: bool = False
+        self._read()
+
+    @property
+    def file(self) -> Path:
+        return self.path / self.CACHE_FILE
+
+    @staticmethod
+    def fingerprint(path: Path) -> Fingerprint:
+        stat = path.stat()
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()
+        return (str(path.resolve()), stat.st_mtime_ns, stat.st_size, digest)
+
+    def _read(self):
+        try:
+            with open(self.file, "rb") as file:
+                state = pickle.load(file)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            self.logger.warning(f"Ignoring unreadable cache {self.file}: {e}")
+            return
+        if not isinstance(state, dict) or state.get("version") != version():
+            self.logger.debug(f"Discarding cache {self.file} of another version")
+            return
+        self._layers = state.get("layers", {})
+        self._config = state.get("config")
+
+    def has_layer(self, fingerprint: Fingerprint) -> bool:
+        return fingerprint in self._layers
+
+    def layer(self, fingerprint: Fingerprint, load: Callable[[], Any]) -> Any:
+        """Returns a fresh copy of the parsed layer, calling load only on a miss."""
+        self._used_layers.add(fingerprint)
+        if fingerprint in self._layers:
+            self.logger.debug(f"Layer cache hit: {fingerprint[0]}")
+            return pickle.loads(self._layers[fingerprint])
+        self.logger.debug(f"Layer cache miss: {fingerprint[0]}")
+        data = load()
+        self._layers[fingerprint] = pickle.dumps(data)
+        self._dirty = True
+        return data
+
+    def get_config(self, fingerprints: tuple[Fingerprint, ...]) -> Optional[Any]:
+        if self._config is None or self._config[0] != fingerprints:
+            return None
+        try:
+            configuration = pickle.loads(self._config[1])
+        except Exception as e:
+            self.logger.warning(f"Ignoring unreadable cached configuration: {e}")
+            return None
+        self.logger.debug("Configuration cache hit")
+        self._used_layers.update(fingerprints)
+        return configuration
+
+    def set_config(self, fingerprints: tuple[Fingerprint, ...], configuration: Any):
+        self._config = (fingerprints, pickle.dumps(configuration))
+        self._dirty = True
+
+    def save(self):
+        """Persists the cache atomically, dropping layers not used in this run."""
+        stale = set(self._layers) - self._used_layers
+        for fingerprint in stale:
+            del self._layers[fingerprint]
+        if not self._dirty and not stale:
+            return
+        state = {
+            "version": version(),
+            "layers": self._layers,
+            "config": self._config,
+        }
+        try:
+            self.path.mkdir(mode=0o700, parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=self.path, prefix=f".{self.CACHE_FILE}")
+            try:
+                with os.fdopen(fd, "wb") as file:
+                    pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_name, self.file)
+            except BaseException:
+                os.unlink(tmp_name)
+                raise
+        except OSError as e:
+            self.logger.warning(f"Cannot write cache {self.file}: {e}")
+            return
+        self._dirty = False
@@ -14,24 +14,91 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import copy
 import logging
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Optional
-
-import yaml
+from typing import Any, Iterator, Optional, get_args, get_type_hints
 
+from ..config import NetplannerConfig, NetworkConfig
+from ..interfaces.base import BaseSerializer
+from ..interfaces.typing import validation_cache_info
+from ..topology import Topology
+from .cache import ConfigCache, Fingerprint
+from .formats import SUFFIXES, convert, parse
 from .util import merge_dicts
 
+InterfaceKey = tuple[str, str]
+
+INTERFACE_TYPES = {
+    kind: get_args(hint)[1]
+    for kind, hint in get_type_hints(NetworkConfig).items()
+    if kind in Topology.KINDS
+}
+
+
+def interface_sections(layer: Any) -> Iterator[tuple[str, str, InterfaceKey, Any]]:
+    """Yields the raw keys, the streamlined keys and the configuration of every interface in a layer"""
+    network = layer.get("network") if isinstance(layer, dict) else None
+    if not isinstance(network, dict):
+        return
+    for kind, interfaces in network.items():
+        if not isinstance(kind, str) or not isinstance(interfaces, dict):
+            continue
+        kind_key = BaseSerializer.get_streamlined_key(kind, 1, "-", "_", [2])
+        if kind_key not in INTERFACE_TYPES:
+            continue
+        for name, config in interfaces.items():
+            if isinstance(name, str):
+                name_key = BaseSerializer.get_streamlined_key(name, 2, "-", "_", [2])
+                yield kind, name, (kind_key, name_key), config
+
+
+def parse_layer(
+    path: Path, streaming: bool = False
+) -> tuple[Any, dict[InterfaceKey, Any]]:
+    """
+    Parses a configuration file and validates each of its interfaces on its own,
+    this runs in the worker processes of the ConfigLoader.
+    Interfaces which are incomplete without the other files are left out.
+    """
+    layer = parse(path, streaming)
+    validated = {}
+    for _, _, key, config in interface_sections(layer):
+        try:
+            data = BaseSerializer.streamline_keys(copy.deepcopy(config), level=3)
+            validated[key] = INTERFACE_TYPES[key[0]].from_dict(data)
+        except Exception:
+            continue
+    return layer, validated
+
 
 class ConfigLoader:
     logger = logging.getLogger("config_loader")
     DEFAULT_CONF_DIR = Path("/etc/netplanner/")
     NETPLAN_DEFAULT_CONF_DIR = Path("/etc/netplan/")
 
-    def __init__(self, config: Optional[str] = None):
+    def __init__(
+        self,
+        config: Optional[str] = None,
+        cache: Optional[ConfigCache] = None,
+        streaming: bool = False,
+        workers: int = 1,
+    ):
         self._internal_config: dict = {}
+        # Builds the configuration directly from the YAML events.
+        self.streaming: bool = streaming
+        # Number of processes which parse and pre-validate the files of a directory.
+        self.workers: int = workers
+        self._parsed: dict[Path, Any] = {}
+        self._validated: dict[Path, dict[InterfaceKey, Any]] = {}
+        self._interfaces: dict[InterfaceKey, Any] = {}
         self._is_netplan: bool = False
         self._path: Optional[Path] = None
+        self.cache: Optional[ConfigCache] = cache
+        self._fingerprints: dict[Path, Fingerprint] = {}
         if config is None:
             if self.DEFAULT_CONF_DIR.exists():
                 self.path = self.DEFAULT_CONF_DIR
@@ -61,7 +128,7 @@ class ConfigLoader:
             [
                 path
                 for path in self.path.iterdir()
-                if path.is_file() and path.suffix in [".yaml", ".yml"]
+                if path.is_file() and path.suffix in SUFFIXES
             ],
             reverse=True,
         )
@@ -70,17 +137,123 @@ class ConfigLoader:
         return config_file_list
 
     def _load_file(self, path: Path):
-        with open(path, "r") as file:
-            return yaml.safe_load(file)
+        if path in self._parsed:
+            return self._parsed.pop(path)
+        return parse(path, self.streaming)
+
+    def _parse_parallel(self, paths: list[Path]):
+        pending = [
+            path
+            for path in paths
+            if self.cache is None or not self.cache.has_layer(self._fingerprint(path))
+        ]
+        if self.workers < 2 or len(pending) < 2:
+            return
+        # Not forked, the daemon parses in its request threads.
+        with ProcessPoolExecutor(
+            max_workers=min(self.workers, len(pending)),
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as pool:
+            # map keeps the order of the files, whichever worker finishes first.
+            results = pool.map(parse_layer, pending, [self.streaming] * len(pending))
+            for path, (layer, validated) in zip(pending, results):
+                self._parsed[path] = layer
+                self._validated[path] = validated
+
+    def _fingerprint(self, path: Path) -> Fingerprint:
+        if path not in self._fingerprints:
+            self._fingerprints[path] = ConfigCache.fingerprint(path)
+        return self._fingerprints[path]
+
+    def _load_layer(self, path: Path):
+        if self.cache is None:
+            return self._load_file(path)
+        return self.cache.layer(self._fingerprint(path), lambda: self._load_file(path))
+
+    @property
+    def fingerprints(self) -> tuple[Fingerprint, ...]:
+        if self.path.is_file():
+            return (self._fingerprint(self.path),)
+        return tuple(self._fingerprint(path) for path in self.config_file_list)
 
     def load_config(self) -> bool:
+        self._interfaces = {}
         if self.path.is_file():
-            self._internal_config = self._load_file(self.path)
+            self._internal_config = self._load_layer(self.path)
         else:
-            loaded_configs = [self._load_file(path) for path in self.config_file_list]
+            config_file_list = self.config_file_list
+            self._parse_parallel(config_file_list)
+            loaded_configs = [self._load_layer(path) for path in config_file_list]
+            # Only interfaces defined in a single file are unchanged by merging.
+            defined = Counter(
+                key
+                for layer in loaded_configs
+                for *_, key, _ in interface_sections(layer)
+            )
+            for path in config_file_list:
+                for key, interface in self._validated.pop(path, {}).items():
+                    if defined[key] == 1:
+                        self._interfaces[key] = interface
             self._internal_config = merge_dicts(loaded_configs)
         return self._internal_config is not None
 
+    def _with_validated_interfaces(self, config: dict) -> dict:
+        """Shallow copy of config, with the pre-validated interfaces in place of their sections"""
+        if not self._interfaces:
+            return config
+        network = dict(config["network"])
+        for kind, name, key, _ in interface_sections(config):
+            if key in self._interfaces:
+                if network[kind] is config["network"][kind]:
+                    network[kind] = dict(network[kind])
+                network[kind][name] = self._interfaces[key]
+        return {**config, "network": network}
+
+    def convert(self, destination: Path, suffix: str) -> list[Path]:
+        """
+        Converts every configuration file into the destination directory.
+        The files keep their names, and thus their merge order, with the new suffix.
+        """
+        sources = [self.path] if self.path.is_file() else self.config_file_list
+        targets = [destination / source.with_suffix(suffix).name for source in sources]
+        if len(set(targets)) != len(targets):
+            raise Exception(
+                f"Configuration files in [{self.path}] differ only by suffix"
+            )
+        destination.mkdir(parents=True, exist_ok=True)
+        return [convert(source, target) for source, target in zip(sources, targets)]
+
+    def load_netplanner_config(self) -> NetplannerConfig:
+        """Loads and validates the configuration, served from the cache if unchanged."""
+        fingerprints = self.fingerprints if self.cache is not None else ()
+        if self.cache is not None:
+            configuration = self.cache.get_config(fingerprints)
+            if configuration is not None:
+                self.cache.save()
+                return configuration
+        if not self.load_config():
+            raise Exception("Configuration cannot be loaded.")
+        self.logger.debug(self._internal_config)
+        configuration = NetplannerConfig.from_dict(
+            self._with_validated_interfaces(self._internal_config)
+        )
+        self.log_validation_caches()
+        if self.cache is not None:
+            self.cache.set_config(fingerprints, configuration)
+            self.cache.save()
+        return configuration
+
+    def log_validation_caches(self):
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
+        for name, info in validation_cache_info().items():
+            lookups = info.hits + info.misses
+            if lookups:
+                self.logger.debug(
+                    f"Validation cache {name}: {info.hits}/{lookups} hits "
+                    f"({info.hits / lookups:.0%}), {info.currsize} cached"
+                )
+
     @property
     def is_netplan(self) -> bool:
         return self._is_netplan
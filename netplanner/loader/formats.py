@@ -0,0 +1,85 @@
+# netplanner
+# Copyright (C) 2021-2023 Deutsche Telekom AG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+from pathlib import Path
+from typing import Any
+
+YAML_SUFFIXES = [".yaml", ".yml"]
+JSON_SUFFIX = ".json"
+MSGPACK_SUFFIX = ".msgpack"
+SUFFIXES = YAML_SUFFIXES + [JSON_SUFFIX, MSGPACK_SUFFIX]
+CONVERT_FORMATS = {"json": JSON_SUFFIX, "msgpack": MSGPACK_SUFFIX}
+
+
+def _msgpack():
+    # msgpack is optional, it is only needed for .msgpack configuration files.
+    try:
+        import msgpack  # type: ignore
+    except ImportError:
+        raise Exception(
+            f"{MSGPACK_SUFFIX} configuration files require the msgpack package, "
+            "install netplanner[msgpack]"
+        )
+    return msgpack
+
+
+def parse(path: Path, streaming: bool = False) -> Any:
+    """Parses a configuration file according to its suffix, YAML is the default"""
+    match path.suffix:
+        case ".json":
+            with open(path, "rb") as file:
+                return json.load(file)
+        case ".msgpack":
+            with open(path, "rb") as file:
+                return _msgpack().unpack(file, raw=False, strict_map_key=False)
+        case _:
+            # PyYAML is not needed for the other formats.
+            from .stream import load, load_streaming
+
+            with open(path, "r") as file:
+                if streaming:
+                    return load_streaming(file)
+                return load(file)
+
+
+def dump(data: Any, path: Path):
+    """Writes data in the format of the suffix of path, which must not be YAML"""
+    match path.suffix:
+        case ".json":
+            encoded = json.dumps(data, separators=(",", ":")).encode()
+        case ".msgpack":
+            encoded = _msgpack().packb(data, use_bin_type=True)
+        case _:
+            raise Exception(f"Cannot convert to {path.suffix} files")
+    path.write_bytes(encoded)
+
+
+def convert(source: Path, destination: Path) -> Path:
+    """Converts a configuration file into the format of the suffix of destination"""
+    data = parse(source)
+    try:
+        dump(data, destination)
+    except (TypeError, ValueError) as e:
+        raise Exception(f"{source} cannot be converted to {destination.suffix}: {e}")
+    # JSON turns non-string keys into strings, refuse anything which does not
+    # load back unchanged.
+    if parse(destination) != data:
+        destination.unlink()
+        raise Exception(
+            f"{source} cannot be converted to {destination.suffix} without changes"
+        )
+    return destination
@@ -0,0 +1,218 @@
+# netplanner
+# Copyright (C) 2021-2023 Deutsche Telekom AG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from typing import IO, Any, Union
+
+import yaml
+from yaml.composer import ComposerError
+from yaml.constructor import ConstructorError
+from yaml.nodes import MappingNode, ScalarNode, SequenceNode
+
+# libyaml is an optional extension of PyYAML, fall back to the pure python loader.
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+MAP_TAG = "tag:yaml.org,2002:map"
+SEQ_TAG = "tag:yaml.org,2002:seq"
+STR_TAG = "tag:yaml.org,2002:str"
+MERGE_TAG = "tag:yaml.org,2002:merge"
+VALUE_TAG = "tag:yaml.org,2002:value"
+
+_NO_KEY = object()
+_MERGE = object()
+
+
+def load(stream: Union[str, bytes, IO]) -> Any:
+    """Equivalent of yaml.safe_load, preferring libyaml"""
+    return yaml.load(stream, Loader=SafeLoader)
+
+
+class _Mapping:
+    __slots__ = ("data", "key", "merges", "start_mark")
+
+    def __init__(self, start_mark):
+        self.data: dict = {}
+        self.key: Any = _NO_KEY
+        self.merges: list[list[dict]] = []
+        self.start_mark = start_mark
+
+    def add(self, value: Any, mark):
+        if self.key is _NO_KEY:
+            self.key = value
+            return
+        if self.key is _MERGE:
+            self.merges.append(self._merge_sources(value, mark))
+        else:
+            try:
+                self.data[self.key] = value
+            except TypeError as e:
+                raise ConstructorError(
+                    "while constructing a mapping",
+                    self.start_mark,
+                    f"found unhashable key ({e})",
+                    mark,
+                )
+        self.key = _NO_KEY
+
+    def _merge_sources(self, value: Any, mark) -> list[dict]:
+        if isinstance(value, dict):
+            return [value]
+        if not isinstance(value, list):
+            raise ConstructorError(
+                "while constructing a mapping",
+                self.start_mark,
+                f"expected a mapping or list of mappings for merging, but found {type(value).__name__}",
+                mark,
+            )
+        for source in value:
+            if not isinstance(source, dict):
+                raise ConstructorError(
+                    "while constructing a mapping",
+                    self.start_mark,
+                    f"expected a mapping for merging, but found {type(source).__name__}",
+                    mark,
+                )
+        return value
+
+    def finish(self) -> dict:
+        if not self.merges:
+            return self.data
+        # Same precedence as SafeLoader: explicit keys win over merged keys,
+        # the first mapping of a merged list wins over the following ones.
+        merged: dict = {}
+        for sources in self.merges:
+            for source in reversed(sources):
+                merged.update(source)
+        merged.update(self.data)
+        self.data.clear()
+        self.data.update(merged)
+        return self.data
+
+
+def load_streaming(stream: Union[str, bytes, IO]) -> Any:
+    """
+    Equivalent of yaml.safe_load for a single document, which builds the
+    dicts and lists directly from the parser events instead of composing
+    the complete node graph of the document first.
+    Only the default tags are supported for mappings and sequences.
+    """
+    loader = SafeLoader(stream)
+    try:
+        return _build(loader)
+    finally:
+        loader.dispose()
+
+
+def _build(loader) -> Any:
+    loader.get_event()
+    if loader.check_event(yaml.StreamEndEvent):
+        loader.get_event()
+        return None
+    document_start = loader.get_event()
+    constructors = loader.yaml_constructors
+    anchors: dict[str, Any] = {}
+    stack: list[Union[_Mapping, list]] = []
+    while True:
+        event = loader.get_event()
+        # The marks of libyaml and of the python parser are typed apart.
+        start_mark: Any = event.start_mark
+        if isinstance(event, yaml.AliasEvent):
+            if event.anchor not in anchors:
+                raise ComposerError(
+                    None,
+                    None,
+                    f"found undefined alias {event.anchor!r}",
+                    start_mark,
+                )
+            value = anchors[event.anchor]
+        elif isinstance(event, (yaml.MappingEndEvent, yaml.SequenceEndEvent)):
+            collection = stack.pop()
+            value = (
+                collection.finish() if isinstance(collection, _Mapping) else collection
+            )
+        else:
+            if event.anchor is not None and event.anchor in anchors:
+                raise ComposerError(
+                    f"found duplicate anchor {event.anchor!r}",
+                    None,
+                    "second occurrence",
+                    start_mark,
+                )
+            tag = event.tag
+            if isinstance(event, yaml.ScalarEvent):
+                if tag is None or tag == "!":
+                    tag = loader.resolve(ScalarNode, event.value, event.implicit)
+                parent = stack[-1] if stack else None
+                in_key = isinstance(parent, _Mapping) and parent.key is _NO_KEY
+                if in_key and tag == MERGE_TAG:
+                    value = _MERGE
+                else:
+                    if in_key and tag == VALUE_TAG:
+                        tag = STR_TAG
+                    end_mark: Any = event.end_mark
+                    node = ScalarNode(
+                        tag, event.value, start_mark, end_mark, event.style
+                    )
+                    value = constructors.get(tag, constructors[None])(loader, node)
+            elif isinstance(event, yaml.MappingStartEvent):
+                if tag is None or tag == "!":
+                    tag = loader.resolve(MappingNode, None, event.implicit)
+                if tag != MAP_TAG:
+                    raise ConstructorError(
+                        None,
+                        None,
+                        f"the streaming loader does not support the tag {tag!r}",
+                        start_mark,
+                    )
+                mapping = _Mapping(start_mark)
+                if event.anchor is not None:
+                    anchors[event.anchor] = mapping.data
+                stack.append(mapping)
+                continue
+            else:
+                if tag is None or tag == "!":
+                    tag = loader.resolve(SequenceNode, None, event.implicit)
+                if tag != SEQ_TAG:
+                    raise ConstructorError(
+                        None,
+                        None,
+                        f"the streaming loader does not support the tag {tag!r}",
+                        start_mark,
+                    )
+                sequence: list = []
+                if event.anchor is not None:
+                    anchors[event.anchor] = sequence
+                stack.append(sequence)
+                continue
+            if event.anchor is not None:
+                anchors[event.anchor] = value
+        if not stack:
+            break
+        parent = stack[-1]
+        if isinstance(parent, list):
+            parent.append(value)
+        else:
+            parent.add(value, start_mark)
+    loader.get_event()
+    if not loader.check_event(yaml.StreamEndEvent):
+        event = loader.get_event()
+        raise ComposerError(
+            "expected a single document in the stream",
+            document_start.start_mark,
+            "but found another document",
+            event.start_mark,
+        )
+    loader.get_event()
+    return value
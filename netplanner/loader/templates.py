@@ -14,17 +14,30 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import hashlib
+import json
 from importlib import import_module
 from importlib.resources import contents, is_resource, read_binary
-from typing import Any
+from pathlib import Path
+from typing import Any, Optional
 
-from jinja2 import BaseLoader, TemplateNotFound
+from jinja2 import BaseLoader, Environment, ModuleLoader, TemplateNotFound
+from jinja2.utils import internalcode
+
+COMPILED = "compiled"
+DIGESTS = "digests.json"
 
 
 class ImportLibLoader(BaseLoader):
-    """ """
+    """Loads templates from package resources, resource listings are cached."""
 
     IGNORED = ["py", "pyo", "pyc", "__pycache__"]
+    IGNORED_DIRECTORIES = ["__pycache__", COMPILED]
+
+    def _ignored(self, content: str) -> bool:
+        return content in self.IGNORED_DIRECTORIES or any(
+            content.endswith(f".{ending}") for ending in self.IGNORED
+        )
 
     @staticmethod
     def _get_path_template(path_template: str) -> tuple[str, str]:
@@ -38,19 +51,18 @@ class ImportLibLoader(BaseLoader):
         path = path.replace("/", ".")
         return path, template
 
-    @staticmethod
-    def _has_resource(module, template) -> bool:
-        return any(
-            [
-                content == template
-                for content in contents(module)
-                if is_resource(module, template)
-            ]
-        )
+    def _has_resource(self, module, template) -> bool:
+        if module.__name__ not in self._contents:
+            self._contents[module.__name__] = {
+                content: is_resource(module, content) for content in contents(module)
+            }
+        return self._contents[module.__name__].get(template, False)
 
     def __init__(self, module, encoding="utf-8"):
         self.module = module
         self.encoding: str = encoding
+        self._contents: dict[str, dict[str, bool]] = {}
+        self._sources: dict[str, str] = {}
 
     def _get_module(self, path_template, module=None) -> tuple[Any, str]:
         path, template = ImportLibLoader._get_path_template(path_template)
@@ -67,22 +79,46 @@ class ImportLibLoader(BaseLoader):
             )
 
     def get_source(self, _, path_template):
-        module, template = self._get_module(path_template)
-        if not ImportLibLoader._has_resource(module, template):
-            raise TemplateNotFound(template)
-        source = read_binary(module, template)
+        if path_template not in self._sources:
+            module, template = self._get_module(path_template)
+            if not self._has_resource(module, template):
+                raise TemplateNotFound(template)
+            source = read_binary(module, template)
+            self._sources[path_template] = source.decode(self.encoding)
 
         def uptodate():
             return True
 
-        return source.decode(self.encoding), None, uptodate
+        return self._sources[path_template], None, uptodate
+
+    def digest(self, path_template: str) -> str:
+        source, _, _ = self.get_source(None, path_template)
+        return hashlib.sha256(source.encode(self.encoding)).hexdigest()
+
+    def template_names(self) -> list[str]:
+        """Names of all templates as accepted by get_template"""
+        results = []
+
+        def _walk(module, prefix: str):
+            for content in contents(module):
+                if self._ignored(content):
+                    continue
+                if not is_resource(module, content):
+                    new_module, _ = self._get_module(f"{prefix}{content}/")
+                    _walk(new_module, f"{prefix}{content}/")
+                else:
+                    results.append(f"{prefix}{content}")
+
+        _walk(self.module, "")
+        results.sort()
+        return results
 
     def list_templates(self):
         results = []
 
         def _walk(module):
             for content in contents(module):
-                if any(content.endswith(f".{ending}") for ending in self.IGNORED):
+                if self._ignored(content):
                     continue
                 if not is_resource(module, content):
                     new_module, path = self._get_module(f"{content}/", module)
@@ -93,3 +129,89 @@ class ImportLibLoader(BaseLoader):
         _walk(self.module)
         results.sort()
         return results
+
+
+class PrecompiledLoader(ModuleLoader):
+    """
+    Loads templates precompiled into Python modules by precompile().
+
+    Falls back to compiling the source if a template was not precompiled or
+    its source changed since.
+    """
+
+    def __init__(self, path: Path, source_loader: ImportLibLoader):
+        super().__init__(path)
+        self.source_loader = source_loader
+        with open(path / DIGESTS, "r") as file:
+            self.digests: dict[str, str] = json.load(file)
+
+    @internalcode
+    def load(self, environment, name, globals=None):
+        if self.digests.get(name) == self.source_loader.digest(name):
+            try:
+                return super().load(environment, name, globals)
+            except TemplateNotFound:
+                pass
+        return self.source_loader.load(environment, name, globals)
+
+    def list_templates(self):
+        return self.source_loader.list_templates()
+
+
+def compiled_path(module) -> Optional[Path]:
+    if getattr(module, "__file__", None) is None:
+        return None
+    path = Path(module.__file__).parent / COMPILED
+    return path if (path / DIGESTS).exists() else None
+
+
+def template_environment(module, **options) -> Environment:
+    """Environment for the templates of module, preferring precompiled ones"""
+    source_loader = ImportLibLoader(module)
+    loader: BaseLoader = source_loader
+    path = compiled_path(module)
+    if path is not None:
+        loader = PrecompiledLoader(path, source_loader)
+    return Environment(loader=loader, **options)
+
+
+def template_set_digest(module) -> str:
+    """Digest of the sources of all templates of module"""
+    source_loader = ImportLibLoader(module)
+    digests = {
+        name: source_loader.digest(name) for name in source_loader.template_names()
+    }
+    return hashlib.sha256(json.dumps(digests, sort_keys=True).encode()).hexdigest()
+
+
+def precompile(environment: Environment, module) -> Path:
+    """
+    Build step compiling all templates of module into Python modules.
+
+    The modules are written to the compiled directory next to the templates,
+    the filters used by the templates have to be registered on environment.
+    """
+    source_loader = ImportLibLoader(module)
+    path = Path(module.__file__).parent / COMPILED
+    path.mkdir(exist_ok=True)
+    compiler = environment.overlay(loader=source_loader)
+    digests = {}
+    for name in source_loader.template_names():
+        source, filename, _ = source_loader.get_source(compiler, name)
+        code = compiler.compile(source, name, filename, raw=True, defer_init=True)
+        with open(path / ModuleLoader.get_module_filename(name), "w") as file:
+            file.write(code)
+        digests[name] = source_loader.digest(name)
+    with open(path / DIGESTS, "w") as file:
+        json.dump(digests, file, indent=1, sort_keys=True)
+    return path
+
+
+if __name__ == "__main__":
+    from ..providers.networkd import templates as networkd_templates
+    from ..providers.networkd.provider import NetworkdProvider
+    from ..sriov import templates as sriov_templates
+    from ..sriov.__main__ import template_env
+
+    print(precompile(NetworkdProvider.environment(), networkd_templates))
+    print(precompile(template_env(), sriov_templates))
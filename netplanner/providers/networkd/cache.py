@@ -0,0 +1,210 @@
+# netplanner
+# Copyright (C) 2021-2023 Deutsche Telekom AG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from dataclasses import fields, is_dataclass
+from enum import Enum
+from pathlib import Path
+from typing import Any, Optional
+
+from ... import version
+
+
+PRIMITIVES = {str, int, float, bool, type(None)}
+# Field names of the dataclasses, dataclasses.fields is too slow to call per object.
+_FIELD_NAMES: dict[type, tuple[str, ...]] = {}
+
+
+def digest(value: Any) -> str:
+    data = json.dumps(value, separators=(",", ":"))
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def canonical(value: Any, memo: dict[int, str]) -> Any:
+    """
+    JSON serializable form of template variables which is the same in every
+    process, sets are sorted and dataclasses are replaced by the digest of
+    their type and fields. Fields which are None are left out.
+
+    The digests are kept in memo by the id of the dataclass, so every model
+    is serialized once however many files it is rendered into. memo must
+    not outlive the models.
+    """
+    value_type = type(value)
+    if value_type in PRIMITIVES:
+        return value
+    if id(value) in memo:
+        return memo[id(value)]
+    if value_type not in _FIELD_NAMES and is_dataclass(value):
+        _FIELD_NAMES[value_type] = tuple(field.name for field in fields(value))
+    if value_type in _FIELD_NAMES:
+        result: list = [value_type.__qualname__]
+        for name in _FIELD_NAMES[value_type]:
+            item = getattr(value, name)
+            if item is not None:
+                result.append([name, canonical(item, memo)])
+        memo[id(value)] = digest(result)
+        return memo[id(value)]
+    match value:
+        case Enum():
+            return [value_type.__qualname__, canonical(value.value, memo)]
+        case str() | int() | float():
+            return [value_type.__qualname__, value]
+        case dict():
+            return [
+                [canonical(key, memo), canonical(item, memo)]
+                for key, item in value.items()
+            ]
+        case list() | tuple():
+            return [canonical(item, memo) for item in value]
+        case set() | frozenset():
+            return sorted((canonical(item, memo) for item in value), key=repr)
+        case _:
+            return [value_type.__qualname__, str(value)]
+
+
+class RenderCache:
+    """
+    Rendered files of previous runs, keyed by a digest of everything their
+    template renders: the file name, which contains the priority and the
+    interface name, the template, the template variables with the interface
+    model and its resolved parents and children, the template set and the
+    render backend.
+
+    The cache is stored next to the rendered files and bounded to max_size
+    characters of content, the least recently used files are evicted first.
+    """
+
+    logger = logging.getLogger("render_cache")
+    CACHE_FILE = ".netplanner-render-cache.json"
+    DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+    def __init__(
+        self,
+        path: Path,
+        template_set: str,
+        backend: str = "jinja",
+        max_size: int = DEFAULT_MAX_SIZE,
+    ):
+        self.path: Path = path
+        self.template_set: str = template_set
+        # Files rendered by another backend are never served.
+        self.backend: str = backend
+        self.max_size: int = max_size
+        # Insertion order is the order of use, the least recently used first.
+        self._entries: dict[str, str] = {}
+        self._size: int = 0
+        self._loaded: list[str] = []
+        self._dirty: bool = False
+        # Serialized models, only valid as long as the rendered configuration.
+        self._memo: dict[int, str] = {}
+        self.hits: int = 0
+        self.misses: int = 0
+        self._read()
+
+    @property
+    def file(self) -> Path:
+        return self.path / self.CACHE_FILE
+
+    def _read(self):
+        try:
+            with open(self.file, "r") as file:
+                state = json.load(file)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable render cache {self.file}: {e}")
+            return
+        if (
+            not isinstance(state, dict)
+            or state.get("version") != version()
+            or state.get("template_set") != self.template_set
+        ):
+            self.logger.debug(f"Discarding render cache {self.file} of other templates")
+            return
+        for key, content in state.get("entries", []):
+            self._entries[key] = content
+            self._size += len(content)
+        self._loaded = list(self._entries)
+
+    def key(self, file_name: str, template_name: str, variables: dict) -> Optional[str]:
+        """Digest of a file to render, None if its variables cannot be serialized."""
+        try:
+            data = json.dumps(
+                [
+                    self.template_set,
+                    self.backend,
+                    file_name,
+                    template_name,
+                    canonical(variables, self._memo),
+                ],
+                separators=(",", ":"),
+            )
+        except (TypeError, ValueError) as e:
+            self.logger.debug(f"Not caching {file_name}: {e}")
+            return None
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def get(self, key: Optional[str]) -> Optional[str]:
+        if key is None:
+            return None
+        content = self._entries.pop(key, None)
+        if content is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries[key] = content
+        return content
+
+    def put(self, key: Optional[str], content: str):
+        if key is None or len(content) > self.max_size:
+            return
+        self._size -= len(self._entries.pop(key, ""))
+        self._entries[key] = content
+        self._size += len(content)
+        while self._size > self.max_size:
+            evicted = next(iter(self._entries))
+            self._size -= len(self._entries.pop(evicted))
+        self._dirty = True
+
+    def save(self):
+        """Persists the cache atomically if its entries or their order changed."""
+        if not self._dirty and list(self._entries) == self._loaded:
+            return
+        state = {
+            "version": version(),
+            "template_set": self.template_set,
+            "entries": list(self._entries.items()),
+        }
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=self.path, prefix=self.CACHE_FILE)
+            try:
+                with os.fdopen(fd, "w") as file:
+                    json.dump(state, file, separators=(",", ":"))
+                os.replace(tmp_name, self.file)
+            except BaseException:
+                os.unlink(tmp_name)
+                raise
+        except OSError as e:
+            self.logger.warning(f"Cannot write render cache {self.file}: {e}")
+            return
+        self._loaded = list(self._entries)
+        self._dirty = False
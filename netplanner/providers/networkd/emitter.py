@@ -0,0 +1,446 @@
+# netplanner
+# Copyright (C) 2021-2023 Deutsche Telekom AG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Native emitter of the networkd files, building the sections directly from
+the models instead of rendering the templates.
+
+Every function is the counterpart of a template and has to produce the same
+text byte for byte, including its blank lines and the missing newline at the
+end of most files. Values are converted with str() like Jinja does. Where a
+template tests an attribute which not every interface has, the emitter
+follows the semantics of Jinja's Undefined.
+"""
+
+from typing import Any, Callable, Optional
+
+from ...interfaces.l2.bond import Bond
+from ...interfaces.l2.bridge import Bridge
+from ...interfaces.l2.dummy import Dummy
+from ...interfaces.l2.ethernet import Ethernet
+from ...interfaces.l2.veth import Veth
+from ...interfaces.l2.vlan import VLAN
+from ...interfaces.l2.vrf import VRF
+from ...interfaces.l2.vxlan import VXLAN
+from ...topology import Interface
+from .provider import NetworkdProvider
+
+HEADER = NetworkdProvider.MANAGED_HEADER
+
+to_bool = NetworkdProvider.to_systemd_bool
+to_link_local = NetworkdProvider.to_systemd_link_local
+
+
+def _single_child_bridge(
+    interface: Interface, child_interfaces: Optional[dict]
+) -> bool:
+    """Bridges of a single interface take over its MAC address"""
+    return (
+        isinstance(interface, Bridge)
+        and len(interface.interfaces) == 1
+        and bool(child_interfaces)
+    )
+
+
+def _single_child_macaddress(
+    interface: Interface, child_interfaces: Optional[dict]
+) -> Optional[Any]:
+    if not isinstance(interface, Bridge) or not child_interfaces:
+        return None
+    return getattr(child_interfaces.get(interface.interfaces[0]), "macaddress", None)
+
+
+def _match(lines: list[str], interface_name: str, interface: Interface):
+    """network_includes/match.j2"""
+    lines.append("[Match]")
+    match = getattr(interface, "match", None)
+    if match is not None:
+        if match.name is not None:
+            lines.append(f"Name={match.name!s}")
+        if match.macaddress is not None:
+            lines.append(f"MACAddress={match.macaddress!s}")
+        if match.driver is not None:
+            lines.append(f"Driver={match.driver!s}")
+        if isinstance(interface, Ethernet) and (
+            interface.macaddress is not None or interface.set_name is not None
+        ):
+            if interface.macaddress is not None:
+                lines.append(f"PermanentMACAddress={interface.macaddress!s}")
+            if interface.set_name is not None:
+                lines.append(f"Name={interface.set_name!s}")
+    has_set_name = hasattr(interface, "set_name")
+    if (
+        not hasattr(interface, "match")
+        or (match is None and not has_set_name)
+        or (has_set_name and getattr(interface, "set_name") is None)
+    ):
+        lines.append(f"Name={interface_name!s}")
+
+
+def _network(
+    lines: list[str],
+    interface_name: str,
+    interface: Interface,
+    child_interfaces: Optional[dict],
+    parent_interface: Optional[dict],
+):
+    """network_includes/network.j2"""
+    lines.append("[Network]")
+    if interface.description is not None:
+        lines.append(f"Description={interface.description!s}")
+    vrf = getattr(interface, "vrf", None)
+    if vrf is not None:
+        lines.append(f"VRF={vrf!s}")
+    link_local = interface.link_local
+    if link_local is not None:
+        lines.append(f"LinkLocalAddressing={to_link_local(link_local)!s}")
+        if "ipv6" in link_local:
+            lines.append("IPv6LinkLocalAddressGenerationMode=eui64")
+    # Undefined is unequal to None and false, interfaces other than
+    # ethernets get EmitLLDP=no and IPv6AcceptRA=no.
+    emit_lldp = getattr(interface, "emit_lldp", False)
+    if emit_lldp is not None:
+        lines.append(f"EmitLLDP={to_bool(emit_lldp)}")
+    accept_ra = getattr(interface, "accept_ra", False)
+    if accept_ra is not None:
+        lines.append(f"IPv6AcceptRA={to_bool(accept_ra)}")
+    for address in interface.addresses:
+        lines.append(f"Address={address!s}")
+    if isinstance(interface, Ethernet) and parent_interface is not None:
+        for parent in parent_interface.values():
+            if isinstance(parent, Bond) and parent.parameters.primary is not None:
+                primary = parent.parameters.primary == interface_name
+                lines.append(f"PrimarySlave={to_bool(primary)}")
+    if parent_interface is not None:
+        for parent_name, parent in parent_interface.items():
+            if isinstance(parent, Bond) and isinstance(interface, VLAN):
+                lines.append("ConfigureWithoutCarrier=yes")
+            else:
+                lines.append(f"{parent.object_name}={parent_name!s}")
+    if isinstance(interface, (Bond, Dummy)) and child_interfaces is not None:
+        if isinstance(interface, Bond):
+            lines.append("ConfigureWithoutCarrier=yes")
+        for child_name, child in child_interfaces.items():
+            if not isinstance(child, Ethernet):
+                lines.append(f"{child.object_name}={child_name!s}")
+    lines.append("")
+
+
+def _nameserver(lines: list[str], interface: Interface):
+    """network_includes/nameserver.j2"""
+    nameservers = getattr(interface, "nameservers", None)
+    if nameservers is None:
+        return
+    for address in nameservers.addresses:
+        lines.append(f"DNS={address!s}")
+    if nameservers.search:
+        lines.append(f"Domains={' '.join(map(str, nameservers.search))}")
+
+
+def _bridge_port(lines: list[str], interface: Interface):
+    """network_includes/bridge_port.j2"""
+    lines.append("[Bridge]")
+    parameters = getattr(interface, "parameters", None)
+    hairpin = getattr(parameters, "hairpin", None)
+    if hairpin is not None:
+        lines.append(f"HairPin={to_bool(hairpin)}")
+    learning = getattr(parameters, "learning", None)
+    if learning is not None:
+        lines.append(f"Learning={to_bool(learning)}")
+
+
+def _link(lines: list[str], interface: Interface, child_interfaces: Optional[dict]):
+    """network_includes/link.j2"""
+    single_child_bridge = _single_child_bridge(interface, child_interfaces)
+    if (
+        interface.mtu is None
+        and interface.macaddress is None
+        and not single_child_bridge
+    ):
+        return
+    lines.append("[Link]")
+    if interface.mtu is not None:
+        lines.append(f"MTUBytes={interface.mtu!s}")
+    if interface.macaddress is not None:
+        lines.append(f"MACAddress={interface.macaddress!s}")
+    elif single_child_bridge:
+        macaddress = _single_child_macaddress(interface, child_interfaces)
+        if macaddress is not None:
+            lines.append(f"MACAddress={macaddress!s}")
+
+
+def _route(lines: list[str], interface: Interface):
+    """network_includes/route.j2"""
+    for route in interface.routes:
+        lines.append("[Route]")
+        if route.on_link is not None:
+            lines.append(f"GatewayOnLink={to_bool(route.on_link)}")
+        if route._from:
+            lines.append(f"Source={route._from!s}")
+        if route.to is not None:
+            lines.append(f"Destination={route.to!s}")
+        if route.via is not None:
+            lines.append(f"Gateway={route.via!s}")
+        if route.metric is not None:
+            lines.append(f"Metric={route.metric!s}")
+        if route.table is not None:
+            lines.append(f"Table={route.table!s}")
+        if route.scope is not None:
+            lines.append(f"Scope={route.scope.value!s}")
+        if route.type is not None:
+            lines.append(f"Type={route.type!s}")
+        if route.congestion_window is not None:
+            lines.append(f"InitialCongestionWindow={route.congestion_window!s}")
+        if route.advertised_receive_window is not None:
+            lines.append(
+                f"InitialAdvertisedReceiveWindow={route.advertised_receive_window!s}"
+            )
+        if route.mtu is not None:
+            lines.append(f"MTUBytes={route.mtu!s}")
+
+
+def _route_policy(lines: list[str], interface: Interface):
+    """network_includes/route_policy.j2"""
+    for route_policy in getattr(interface, "routing_policy", ()):
+        lines.append("[RoutingPolicyRule]")
+        if route_policy.type_of_service is not None:
+            lines.append(f"TypeOfService={route_policy.type_of_service!s}")
+        if route_policy._from is not None:
+            lines.append(f"From={route_policy._from!s}")
+        if route_policy.to is not None:
+            lines.append(f"To={route_policy.to!s}")
+        if route_policy.mark is not None:
+            lines.append(f"FirewallMark={route_policy.mark!s}")
+        if route_policy.table is not None:
+            lines.append(f"Table={route_policy.table!s}")
+        if route_policy.priority is not None:
+            lines.append(f"Priority={route_policy.priority!s}")
+
+
+def network(
+    interface_name: str,
+    interface: Interface,
+    child_interfaces: Optional[dict] = None,
+    parent_interface: Optional[dict] = None,
+) -> str:
+    """systemd.network.j2"""
+    lines = [HEADER]
+    _match(lines, interface_name, interface)
+    lines.append("")
+    _network(lines, interface_name, interface, child_interfaces, parent_interface)
+    _nameserver(lines, interface)
+    if not isinstance(interface, (Bond, Dummy)) and parent_interface is not None:
+        for parent in parent_interface.values():
+            if isinstance(parent, Bridge):
+                _bridge_port(lines, interface)
+    _link(lines, interface, child_interfaces)
+    _route(lines, interface)
+    _route_policy(lines, interface)
+    return "\n".join(lines)
+
+
+def link(interface_name: str, interface: Ethernet) -> str:
+    """systemd.link.j2"""
+    lines = [HEADER, "[Match]"]
+    if interface.match is not None:
+        if interface.match.name is not None:
+            lines.append(f"Name={interface.match.name!s}")
+        if interface.match.macaddress is not None:
+            lines.append(f"MACAddress={interface.match.macaddress!s}")
+        if interface.match.driver is not None:
+            lines.append(f"Driver={interface.match.driver!s}")
+    elif interface.macaddress is not None and interface.macaddress:
+        lines.append(f"PermanentMACAddress={interface.macaddress!s}")
+    else:
+        lines.append(f"OriginalName={interface_name!s}")
+    lines.append("[Link]")
+    if interface.object_name == "Ethernet":
+        lines.append("WakeOnLan=off")
+        if interface.set_name is not None:
+            lines.append(f"Name={interface.set_name!s}")
+    if interface.mtu is not None:
+        lines.append(f"MTUBytes={interface.mtu!s}")
+    return "\n".join(lines)
+
+
+def _bond(lines: list[str], interface: Bond):
+    """netdev_includes/bond.j2"""
+    parameters = interface.parameters
+    lines.append(f"Mode={parameters.mode.value!s}")
+    if parameters.mii_monitor_interval is not None:
+        lines.append(f"MIIMonitorSec={parameters.mii_monitor_interval!s}ms")
+    lines.append("")
+
+
+def _bridge(lines: list[str], interface: Bridge):
+    """netdev_includes/bridge.j2"""
+    parameters = interface.parameters
+    lines.append(f"STP={'yes' if parameters.stp else 'no'}")
+    if parameters.hello_time is not None:
+        lines.append(f"HelloTimeSec={parameters.hello_time!s}")
+    if parameters.max_age is not None:
+        lines.append(f"MaxAgeSec={parameters.max_age!s}")
+    if parameters.forward_delay is not None:
+        lines.append(f"ForwardDelaySec={parameters.forward_delay!s}")
+    if parameters.ageing_time is not None:
+        lines.append(f"AgeingTimeSec={parameters.ageing_time!s}")
+    if parameters.priority is not None:
+        lines.append(f"Priority={parameters.priority!s}")
+    if parameters.default_vlan_port_id is not None:
+        lines.append(f"DefaultPVID={parameters.default_vlan_port_id!s}")
+    if parameters.vlan_filtering is not None:
+        lines.append(f"VLANFiltering={to_bool(parameters.vlan_filtering)}")
+    if parameters.vlan_protocol is not None:
+        lines.append(f"VLANProtocol={parameters.vlan_protocol!s}")
+    if parameters.multicast_snooping is not None:
+        lines.append(f"MulticastSnooping={parameters.multicast_snooping!s}")
+
+
+def _vlan(lines: list[str], interface: VLAN):
+    """netdev_includes/vlan.j2"""
+    lines.append(f"Id={interface.id!s}")
+    parameters = interface.parameters
+    if parameters is None:
+        return
+    if parameters.protocol is not None:
+        lines.append(f"Protocol={parameters.protocol!s}")
+    if parameters.gvrp is not None:
+        lines.append(f"GVRP={to_bool(parameters.gvrp)}")
+    if parameters.mvrp is not None:
+        lines.append(f"MVRP={to_bool(parameters.mvrp)}")
+    if parameters.loose_binding is not None:
+        lines.append(f"LooseBinding={to_bool(parameters.loose_binding)}")
+    if parameters.reorder_header is not None:
+        lines.append(f"ReorderHeader={to_bool(parameters.reorder_header)}")
+
+
+# Optional VXLAN parameters in the order of netdev_includes/vxlan.j2, with
+# whether they are converted by to_systemd_bool.
+VXLAN_OPTIONS = [
+    ("remote", "Remote", False),
+    ("tos", "TOS", False),
+    ("ttl", "TTL", False),
+    ("mac_learning", "MacLearning", True),
+    ("fdb_ageing_sec", "FDBAgeingSec", False),
+    ("maximum_fdb_entries", "MaximumFDBEntries", False),
+    ("reduce_arp_proxy", "ReduceARPProxy", True),
+    ("l2_miss_notification", "L2MissNotification", True),
+    ("l3_miss_notification", "L3MissNotification", True),
+    ("route_short_circuit", "RouteShortCircuit", True),
+    ("udp_checksum", "UDPChecksum", True),
+    ("udp_6_zero_checksum_tx", "UDP6ZeroChecksumTx", True),
+    ("udp_6_zero_checksum_rx", "UDP6ZeroChecksumRx", True),
+    ("remote_checksum_tx", "RemoteChecksumTx", True),
+    ("remote_checksum_rx", "RemoteChecksumRx", True),
+    ("group_policy_extension", "GroupPolicyExtension", True),
+    ("generic_protocol_extension", "GenericProtocolExtension", True),
+    ("flow_label", "FlowLabel", False),
+    ("ip_do_not_fragment", "IPDoNotFragment", True),
+]
+
+
+def _vxlan(lines: list[str], interface: VXLAN):
+    """netdev_includes/vxlan.j2"""
+    parameters = interface.parameters
+    lines.append(f"VNI={parameters.vni!s}")
+    lines.append(f"Local={parameters.local!s}")
+    lines.append(f"DestinationPort={parameters.destination_port!s}")
+    for name, key, is_bool in VXLAN_OPTIONS:
+        value = getattr(parameters, name)
+        if value is not None:
+            lines.append(f"{key}={to_bool(value) if is_bool else str(value)}")
+
+
+def netdev(
+    interface_name: str,
+    interface: Interface,
+    peer_interface: Optional[Interface] = None,
+    child_interfaces: Optional[dict] = None,
+) -> str:
+    """systemd.netdev.j2"""
+    lines = [HEADER, "[NetDev]"]
+    if interface.description is not None:
+        lines.append(f"Description={interface.description!s}")
+    lines.append(f"Name={interface_name!s}")
+    lines.append(f"Kind={interface.object_name.lower()}")
+    if interface.mtu is not None:
+        lines.append(f"MTUBytes={interface.mtu!s}")
+    if interface.macaddress is not None:
+        lines.append(f"MACAddress={interface.macaddress!s}")
+    elif _single_child_bridge(interface, child_interfaces):
+        macaddress = _single_child_macaddress(interface, child_interfaces)
+        if macaddress is not None:
+            lines.append(f"MACAddress={macaddress!s}")
+    lines.extend(("", ""))
+    match interface:
+        case Dummy() | Veth():
+            pass
+        case Bridge():
+            lines.append("[Bridge]")
+            _bridge(lines, interface)
+        case VLAN():
+            lines.append("[VLAN]")
+            _vlan(lines, interface)
+        case VXLAN():
+            lines.append("[VXLAN]")
+            _vxlan(lines, interface)
+        case Bond():
+            lines.append("[Bond]")
+            _bond(lines, interface)
+        case VRF():
+            lines.append("[VRF]")
+            lines.append(f"Table={interface.table!s}")
+        case _:
+            lines.append(f"[{interface.object_name}]")
+    if isinstance(interface, Veth):
+        lines.append("[Peer]")
+        lines.append(f"Name={interface.link!s}")
+        peer_macaddress = getattr(peer_interface, "macaddress", None)
+        if peer_macaddress is not None:
+            lines.append(f"MACAddress={peer_macaddress!s}")
+    return "\n".join(lines)
+
+
+def _iterable(value: Any) -> bool:
+    try:
+        iter(value)
+    except TypeError:
+        return False
+    return True
+
+
+def additionals(data: list[dict[str, list[dict[str, Any]]]]) -> str:
+    """additionals.j2, lists of values are preceded by a blank line"""
+    lines = [HEADER]
+    for section_options in data:
+        for section, options in section_options.items():
+            lines.append(f"[{section!s}]")
+            for option in options:
+                for key, value in option.items():
+                    if isinstance(value, str) or not _iterable(value):
+                        lines.append(f"{key!s}={value!s}")
+                    else:
+                        lines.append("")
+                        lines.extend(f"{key!s}={item!s}" for item in value)
+    return "\n".join(lines)
+
+
+# The emitter of each template, called with the same variables.
+EMITTERS: dict[str, Callable[..., str]] = {
+    "systemd.network.j2": network,
+    "systemd.link.j2": link,
+    "systemd.netdev.j2": netdev,
+    "additionals.j2": additionals,
+}
@@ -14,9 +14,21 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import hashlib
+import json
 import logging
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
 from pathlib import Path
-from subprocess import PIPE, run
+from subprocess import PIPE, CalledProcessError, run
+from typing import AbstractSet, Any, Callable, Iterator, Optional
 
 from jinja2 import Environment
 
@@ -30,26 +42,84 @@ from ...interfaces.l2.veth import Veth
 from ...interfaces.l2.vlan import VLAN
 from ...interfaces.l2.vrf import VRF
 from ...interfaces.l2.vxlan import VXLAN
-from ...loader.templates import ImportLibLoader
+from ...loader.templates import template_environment, template_set_digest
 from ...providers.networkd import templates
+from .cache import RenderCache
+
+# A file to render: its name, the template and the template variables.
+Unit = tuple[str, str, dict[str, Any]]
+
+
+@dataclass
+class RenderChanges:
+    added: set[str] = field(default_factory=set)
+    changed: set[str] = field(default_factory=set)
+    removed: set[str] = field(default_factory=set)
+    unchanged: set[str] = field(default_factory=set)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+    def __str__(self) -> str:
+        return (
+            f"added={sorted(self.added)} changed={sorted(self.changed)} "
+            f"removed={sorted(self.removed)} unchanged={len(self.unchanged)}"
+        )
+
+
+@dataclass
+class ReloadPlan:
+    restart: bool = False
+    reload: bool = False
+    reconfigure: set[str] = field(default_factory=set)
+    recreate: set[str] = field(default_factory=set)
+    trigger: set[str] = field(default_factory=set)
+
+    def __str__(self) -> str:
+        if self.restart:
+            return f"restart systemd-networkd trigger={sorted(self.trigger)}"
+        return (
+            f"reload={self.reload} recreate={sorted(self.recreate)} "
+            f"reconfigure={sorted(self.reconfigure)} trigger={sorted(self.trigger)}"
+        )
 
 
 class NetworkdProvider:
-    env: Environment = Environment(loader=ImportLibLoader(templates))
+    env: Environment = template_environment(templates)
     priority: int = 10
     logger = logging.getLogger("networkd")
     DEFAULT_PATH = "etc/systemd/network"
+    MANIFEST = ".netplanner-manifest.json"
+    STAGING = ".netplanner-staging"
+    # First line of every file rendered by netplanner, files with it are pruned.
+    MANAGED_HEADER = "# netplanner managed"
+    ENDINGS = (".network", ".netdev", ".link")
+    BACKENDS = ["jinja", "native"]
+    FILE_NAME_RE = re.compile(
+        r"^(?P<priority>\d+)-(?P<name>.+)\.(network|netdev|link)$"
+    )
+    SYSFS = Path("/sys")
+    # Errors of ip and networkctl for links which do not exist (any more).
+    MISSING_LINK_RE = re.compile(r"cannot find device|no such device|not found", re.I)
 
     @staticmethod
-    def run_command(command: list[str]) -> None:
-        process = run(
-            command,
-            check=True,
-            stdout=PIPE,
-            stderr=PIPE,
-            universal_newlines=True,
-            encoding="utf-8",
-        )
+    def run_command(command: list[str], missing_ok: bool = False) -> None:
+        try:
+            process = run(
+                command,
+                check=True,
+                stdout=PIPE,
+                stderr=PIPE,
+                universal_newlines=True,
+                encoding="utf-8",
+            )
+        except CalledProcessError as e:
+            if missing_ok and NetworkdProvider.MISSING_LINK_RE.search(e.stderr or ""):
+                NetworkdProvider.logger.warning(
+                    f"{' '.join(command)}: {e.stderr.strip()}"
+                )
+                return
+            raise
         if process.stdout:
             NetworkdProvider.logger.info(process.stdout)
         if process.stderr:
@@ -70,26 +140,94 @@ class NetworkdProvider:
         NetworkdProvider.run_command(command)
 
     @staticmethod
-    def networkctl(reload: bool = False, status: bool = False, all: bool = False):
+    def networkctl(
+        reload: bool = False,
+        status: bool = False,
+        all: bool = False,
+        reconfigure: Optional[list[str]] = None,
+    ):
+        """Links which vanished before networkctl reconfigure are skipped."""
         command = ["/usr/bin/env", "networkctl"]
         if reload:
             command.append("reload")
         elif status:
             command.append("status")
+        elif reconfigure:
+            command.append("reconfigure")
+            command.extend(reconfigure)
         else:
             raise NotImplementedError(
-                f"(reload:={reload} and status:={status}) == False is not implemented"
+                f"(reload:={reload} and status:={status} and reconfigure:={reconfigure}) == False is not implemented"
             )
         if all:
             command.append("--all")
-        NetworkdProvider.run_command(command)
+        NetworkdProvider.run_command(command, missing_ok=bool(reconfigure))
+
+    @staticmethod
+    def link_exists(interface_name: str) -> bool:
+        return (NetworkdProvider.SYSFS / "class" / "net" / interface_name).exists()
+
+    @staticmethod
+    def delete_link(interface_name: str):
+        if not NetworkdProvider.link_exists(interface_name):
+            NetworkdProvider.logger.debug(f"Link {interface_name} does not exist")
+            return
+        NetworkdProvider.run_command(
+            ["/usr/bin/env", "ip", "link", "delete", "dev", interface_name],
+            missing_ok=True,
+        )
+
+    @staticmethod
+    def udev_trigger(interface_name: str):
+        """Applies the .link files to an existing link, networkd does not."""
+        NetworkdProvider.run_command(
+            [
+                "/usr/bin/env",
+                "udevadm",
+                "trigger",
+                "--action=add",
+                str(NetworkdProvider.SYSFS / "class" / "net" / interface_name),
+            ],
+            missing_ok=True,
+        )
+
+    @staticmethod
+    def link_of_macaddress(macaddress: str) -> Optional[str]:
+        """Returns the link with the (permanent) MAC address, bond members share the MAC of the bond."""
+        for path in sorted((NetworkdProvider.SYSFS / "class" / "net").iterdir()):
+            for attribute in ["bonding_slave/perm_hwaddr", "address"]:
+                try:
+                    address = (path / attribute).read_text().strip()
+                except OSError:
+                    continue
+                if address.lower() == macaddress.lower():
+                    return path.name
+                break
+        return None
+
+    @staticmethod
+    def link_of_pciaddress(pciaddress: str) -> Optional[str]:
+        try:
+            links = sorted(
+                (
+                    NetworkdProvider.SYSFS
+                    / "bus"
+                    / "pci"
+                    / "devices"
+                    / pciaddress
+                    / "net"
+                ).iterdir()
+            )
+        except OSError:
+            return None
+        return links[0].name if links else None
 
     @staticmethod
     def to_systemd_bool(value: bool) -> str:
         return "yes" if bool(value) else "no"
 
     @staticmethod
-    def to_systemd_link_local(value: set) -> str:
+    def to_systemd_link_local(value: AbstractSet) -> str:
         if not value:
             return "no"
         if "ipv4" in value and "ipv6" in value:
@@ -98,6 +236,19 @@ class NetworkdProvider:
             return list(value)[0]
         return "no"
 
+    @staticmethod
+    def filters() -> dict[str, Callable]:
+        return {
+            "to_systemd_bool": NetworkdProvider.to_systemd_bool,
+            "to_systemd_link_local": NetworkdProvider.to_systemd_link_local,
+        }
+
+    @staticmethod
+    def environment() -> Environment:
+        env = template_environment(templates)
+        env.filters.update(NetworkdProvider.filters())
+        return env
+
     @staticmethod
     def get_file_ending(data: list):
         for item in data:
@@ -128,24 +279,45 @@ class NetworkdProvider:
             case _:
                 return 17
 
-    def __init__(self, config: NetplannerConfig, local=True, path: str = DEFAULT_PATH):
+    def __init__(
+        self,
+        config: NetplannerConfig,
+        local=True,
+        path: str = DEFAULT_PATH,
+        workers: int = 1,
+        render_cache: bool = True,
+        backend: str = "jinja",
+    ):
         self.config: NetplannerConfig = config
+        if backend not in self.BACKENDS:
+            raise ValueError(
+                f"Unknown render backend {backend}, expected one of {self.BACKENDS}"
+            )
+        # Renders with the templates or with the native emitter, see emitter.py.
+        self.backend: str = backend
+        # Number of processes which render the files.
+        self.workers: int = workers
+        # Reuses the files rendered in previous runs, see RenderCache.
+        self.render_cache: bool = render_cache
         # Ensures that user provided strings are normalized.
-        self.env.filters["to_systemd_bool"] = NetworkdProvider.to_systemd_bool
-        self.env.filters[
-            "to_systemd_link_local"
-        ] = NetworkdProvider.to_systemd_link_local
+        self.env.filters.update(NetworkdProvider.filters())
         path = path.removeprefix("/")
         path = path.removeprefix("./")
-        self.logger.debug(self.env.list_templates())
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(self.env.list_templates())
         prefix = "/"
         if local:
             prefix = "./"
+        # Only render() touches the output directory, see render_to_mapping.
         self.path = Path(f"{prefix}{path}")
-        self.path.mkdir(parents=True, exist_ok=True)
+        self._manifest: dict[str, list] = {}
+        self._rendered: dict[str, list] = {}
+        self._staging: Path = self.path / self.STAGING
+        self._staged: list[str] = []
+        self.changes = RenderChanges()
 
-    def render_networks(self):
-        template = self.env.get_template("systemd.network.j2")
+    def network_units(self) -> Iterator[Unit]:
+        topology = self.config.network.topology
         for interface_name, interface_config in (
             self.config.network.vxlans
             | self.config.network.vrfs
@@ -156,78 +328,26 @@ class NetworkdProvider:
             | self.config.network.ethernets
             | self.config.network.veths
         ).items():
-            child_interfaces = {}
-            parent_interface = None
-            match interface_config:
-                case Bond():
-                    child_interfaces = {
-                        vlan_name: vlan_config
-                        for vlan_name, vlan_config in self.config.network.vlans.items()
-                        if interface_name == vlan_config.link
-                    }
-                    parent_interface = {
-                        name: config
-                        for name, config in self.config.network.bridges.items()
-                        if interface_name in config.interfaces
-                    }
-                case Dummy():
-                    child_interfaces = {
-                        vxlan_name: vxlan_config
-                        for vxlan_name, vxlan_config in self.config.network.vxlans.items()
-                        if interface_name == vxlan_config.link
-                    }
-                case VLAN() if interface_config.link is not None:
-                    parent_interface = self.config.network.lookup(interface_config.link)
-                case Ethernet():
-                    parent_interface = {
-                        name: config
-                        for name, config in self.config.network.bonds.items()
-                        if interface_name in config.interfaces
-                    }
-                case VXLAN():
-                    parent_interface = {
-                        name: config
-                        for name, config in self.config.network.bridges.items()
-                        if interface_name in config.interfaces
-                    }
-                case Bridge():
-                    child_interfaces = {
-                        name: config
-                        for name, config in self.config.network.vxlans.items()
-                        if name in interface_config.interfaces
-                    }
-            if parent_interface is not None and len(parent_interface) > 1:
-                raise ValueError(
-                    f"Cannot have more than one parent interface for {interface_name}"
-                )
+            child_interfaces = topology.children(interface_name)
+            parent_interface = topology.parents(interface_name)
 
             file_name = f"{NetworkdProvider.get_priority(interface_config)}-{interface_name}.network"
-            with open(self.path / file_name, "w") as file:
-                self.logger.info(f"Write: {self.path / file_name}")
-                file.write(
-                    template.render(
-                        interface_name=interface_name,
-                        interface=interface_config,
-                        child_interfaces=child_interfaces,
-                        parent_interface=parent_interface,
-                    )
-                )
+            yield file_name, "systemd.network.j2", dict(
+                interface_name=interface_name,
+                interface=interface_config,
+                child_interfaces=child_interfaces,
+                parent_interface=parent_interface,
+            )
 
-    def render_links(self):
-        template = self.env.get_template("systemd.link.j2")
+    def link_units(self) -> Iterator[Unit]:
         for interface_name, interface_config in self.config.network.ethernets.items():
             file_name = f"{NetworkdProvider.get_priority(interface_config)}-{interface_name}.link"
-            with open(self.path / file_name, "w") as file:
-                self.logger.info(f"Write: {self.path / file_name}")
-                file.write(
-                    template.render(
-                        interface_name=interface_name, interface=interface_config
-                    )
-                )
+            yield file_name, "systemd.link.j2", dict(
+                interface_name=interface_name, interface=interface_config
+            )
 
-    def render_netdevs(self):
+    def netdev_units(self) -> Iterator[Unit]:
         handled_veth_pairs = []
-        template = self.env.get_template("systemd.netdev.j2")
         for interface_name, interface_config in (
             self.config.network.vxlans
             | self.config.network.vrfs
@@ -248,35 +368,347 @@ class NetworkdProvider:
                         continue
                     peer_interface = self.config.network.veths[interface_config.link]
                 case Bridge():
-                    child_interfaces = {
-                        name: config
-                        for name, config in self.config.network.vxlans.items()
-                        if name in interface_config.interfaces
-                    }
-            file_name = f"{NetworkdProvider.get_priority(interface_config)}-{interface_name}.netdev"
-            with open(self.path / file_name, "w") as file:
-                self.logger.info(f"Write: {self.path / file_name}")
-                file.write(
-                    template.render(
-                        interface_name=interface_name,
-                        interface=interface_config,
-                        peer_interface=peer_interface,
-                        child_interfaces=child_interfaces,
+                    child_interfaces = self.config.network.topology.children(
+                        interface_name
                     )
-                )
+            file_name = f"{NetworkdProvider.get_priority(interface_config)}-{interface_name}.netdev"
+            yield file_name, "systemd.netdev.j2", dict(
+                interface_name=interface_name,
+                interface=interface_config,
+                peer_interface=peer_interface,
+                child_interfaces=child_interfaces,
+            )
 
-    def render(self):
-        self.render_netdevs()
-        self.render_links()
-        self.render_networks()
-        template = self.env.get_template("additionals.j2")
+    def additional_units(self) -> Iterator[Unit]:
         for file_name, data in self.config.network.additionals.items():
             assert file_name.endswith(
                 ("link", "network", "netdev")
             ), "only networkd endings are allowed."
+            yield file_name, "additionals.j2", dict(data=data)
+
+    def units(self) -> list[Unit]:
+        """All files in the order they are written, netdevs before links and networks."""
+        return [
+            *self.netdev_units(),
+            *self.link_units(),
+            *self.network_units(),
+            *self.additional_units(),
+        ]
+
+    def render_units(self, units: list[Unit]) -> Iterator[str]:
+        """
+        Renders the units in their order, in a pool of worker processes if
+        more than one worker is configured. Every worker renders with its own
+        Environment, the contents are the same as rendered in this process.
+        """
+        if self.workers < 2 or len(units) < 2:
+            render = self.renderer()
+            for unit in units:
+                yield render(unit)
+            return
+        workers = min(self.workers, len(units))
+        # The daemon renders from a thread, forking a multithreaded process
+        # may copy held locks into the workers.
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_render_worker,
+        ) as pool:
+            # map keeps the order of the units, whichever worker finishes first.
+            yield from pool.map(
+                partial(render_unit, backend=self.backend),
+                units,
+                chunksize=max(1, len(units) // (workers * 4)),
+            )
+
+    def _write_units(self, units: list[Unit]):
+        self.path.mkdir(parents=True, exist_ok=True)
+        for (file_name, _, _), content in zip(units, self.render_units(units)):
             with open(self.path / file_name, "w") as file:
                 self.logger.info(f"Write: {self.path / file_name}")
-                file.write(template.render(data=data))
+                file.write(content)
+
+    def render_networks(self):
+        """Deprecated, writes the .network files without staging, see render()."""
+        warnings.warn(
+            "render_networks is deprecated, use render()", DeprecationWarning, 2
+        )
+        self._write_units(list(self.network_units()))
+
+    def render_links(self):
+        """Deprecated, writes the .link files without staging, see render()."""
+        warnings.warn("render_links is deprecated, use render()", DeprecationWarning, 2)
+        self._write_units(list(self.link_units()))
+
+    def render_netdevs(self):
+        """Deprecated, writes the .netdev files without staging, see render()."""
+        warnings.warn(
+            "render_netdevs is deprecated, use render()", DeprecationWarning, 2
+        )
+        self._write_units(list(self.netdev_units()))
+
+    def renderer(self) -> Callable[[Unit], str]:
+        if self.backend == "native":
+            # The emitter imports this module.
+            from .emitter import EMITTERS
+
+            return lambda unit: EMITTERS[unit[1]](**unit[2])
+        return lambda unit: self.env.get_template(unit[1]).render(**unit[2])
+
+    def rendered(
+        self, cache: Optional[RenderCache] = None
+    ) -> Iterator[tuple[str, bytes]]:
+        """
+        Yields the file name and content of every file in the order of units,
+        the files missing in cache are rendered and put into it.
+        """
+        units = self.units()
+        keys = [cache.key(*unit) if cache else None for unit in units]
+        cached = [cache.get(key) if cache else None for key in keys]
+        # Only the files missing in the cache are rendered, in their order.
+        rendered = self.render_units(
+            [unit for unit, content in zip(units, cached) if content is None]
+        )
+        for (file_name, _, _), key, content in zip(units, keys, cached):
+            if content is None:
+                content = next(rendered)
+                if cache is not None:
+                    cache.put(key, content)
+            yield file_name, content.encode("utf-8")
+
+    def render_to_mapping(self) -> dict[str, bytes]:
+        """
+        Renders all files in memory, without any access to the output
+        directory. Returns the content of every file by its name relative
+        to the output directory, in the order render() writes them.
+        """
+        return dict(self.rendered())
+
+    def write(self, file_name: str, data: bytes):
+        """Stages data for file_name unless it is already on disk.
+
+        The manifest records digest, size and mtime of every written file, a
+        file whose stat still matches its entry is not read back.
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path / file_name
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            stat = None
+        if stat is not None and stat.st_size == len(data):
+            entry = [digest, stat.st_size, stat.st_mtime_ns]
+            if self._manifest.get(file_name) == entry or path.read_bytes() == data:
+                self.logger.debug(f"Unchanged: {path}")
+                self.changes.unchanged.add(file_name)
+                self._rendered[file_name] = entry
+                return
+        if stat is None:
+            self.changes.added.add(file_name)
+        else:
+            self.changes.changed.add(file_name)
+        staged = self._staging / file_name
+        with open(staged, "wb") as file:
+            file.write(data)
+            # Only the staged files are flushed, os.sync would flush every filesystem.
+            os.fsync(file.fileno())
+        self._staged.append(file_name)
+        # The rename keeps the mtime of the staged file.
+        stat = staged.stat()
+        self._rendered[file_name] = [digest, stat.st_size, stat.st_mtime_ns]
+
+    def _swap(self):
+        """Moves the staged files into place, each rename is atomic."""
+        for file_name in self._staged:
+            path = self.path / file_name
+            os.replace(self._staging / file_name, path)
+            self.logger.info(f"Write: {path}")
+
+    def _prune(self) -> set[str]:
+        """
+        Removes the files of previous runs which were not rendered again,
+        only files starting with MANAGED_HEADER are removed.
+        """
+        removed = set()
+        header = self.MANAGED_HEADER.encode("utf-8")
+        candidates = set(self._manifest) | {
+            path.name
+            for path in self.path.iterdir()
+            if path.name.endswith(self.ENDINGS) and path.is_file()
+        }
+        for file_name in sorted(candidates - set(self._rendered)):
+            path = self.path / file_name
+            try:
+                with open(path, "rb") as file:
+                    if file.readline().rstrip(b"\n") != header:
+                        continue
+                path.unlink()
+            except FileNotFoundError:
+                if file_name in self._manifest:
+                    removed.add(file_name)
+                continue
+            except OSError as e:
+                self.logger.warning(f"Cannot remove {path}: {e}")
+                continue
+            self.logger.info(f"Remove: {path}")
+            removed.add(file_name)
+        return removed
+
+    def _fsync_directory(self):
+        fd = os.open(self.path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _read_manifest(self) -> dict[str, list]:
+        try:
+            with open(self.path / self.MANIFEST, "r") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_manifest(self):
+        with open(self.path / self.MANIFEST, "w") as file:
+            json.dump(self._rendered, file, indent=1, sort_keys=True)
+
+    def interface_of(self, file_name: str) -> Optional[str]:
+        """
+        Returns the system interface name a rendered file configures, None if
+        it cannot be determined. The link of a matched ethernet is looked up
+        in sysfs by its MAC or PCI address, then by its names.
+        """
+        if file_name in self.config.network.additionals:
+            return None
+        match = self.FILE_NAME_RE.match(file_name)
+        if match is None:
+            return None
+        interface_name = match.group("name")
+        # Plain str lookup, stale file names do not have to be valid InterfaceNames.
+        ethernet = self.config.network.ethernets.get(interface_name)  # type: ignore[arg-type]
+        if ethernet is None:
+            # A removed ethernet, see get_priority, may have been matched or renamed.
+            if match.group("priority") == "10":
+                return None
+            return interface_name
+        if ethernet.match is None:
+            return ethernet.set_name or interface_name
+        link = None
+        if ethernet.match.macaddress is not None:
+            link = self.link_of_macaddress(str(ethernet.match.macaddress))
+        elif ethernet.match.pciaddress is not None:
+            link = self.link_of_pciaddress(ethernet.match.pciaddress)
+        if link is not None:
+            return link
+        for name in [ethernet.set_name, ethernet.match.name]:
+            # Names with wildcards are patterns, not links.
+            if name is not None and not re.search(r"[*?\[]", name):
+                if self.link_exists(name):
+                    return name
+        return None
+
+    def plan_reload(self, changes: RenderChanges) -> ReloadPlan:
+        """
+        Chooses the cheapest action which applies the changes.
+
+        networkd creates new netdevs and re-reads .network files on reload,
+        existing netdevs however are never updated or removed by it. .link
+        files are applied by udev, which is triggered for existing links.
+        Links which do not exist are neither deleted nor reconfigured.
+        """
+        plan = ReloadPlan()
+        for file_name in sorted(changes.added | changes.changed | changes.removed):
+            ending = file_name.rsplit(".", maxsplit=1)[-1]
+            interface_name = self.interface_of(file_name)
+            if interface_name is None:
+                plan.restart = True
+                continue
+            plan.reload = True
+            if not self.link_exists(interface_name):
+                continue
+            if ending == "netdev" and file_name not in changes.added:
+                plan.recreate.add(interface_name)
+            elif ending == "network" and file_name in changes.changed:
+                plan.reconfigure.add(interface_name)
+            elif ending == "link":
+                plan.trigger.add(interface_name)
+        return plan
+
+    def apply_reload(self, plan: ReloadPlan):
+        self.logger.info(plan)
+        for interface_name in sorted(plan.trigger):
+            self.udev_trigger(interface_name)
+        if plan.restart:
+            self.networkd(restart=True)
+            self.networkctl(reload=True)
+            return
+        for interface_name in sorted(plan.recreate):
+            self.delete_link(interface_name)
+        if plan.reload:
+            self.networkctl(reload=True)
+        reconfigure = sorted(plan.reconfigure - plan.recreate)
+        if reconfigure:
+            self.networkctl(reconfigure=reconfigure)
+
+    def render(self) -> RenderChanges:
+        """
+        Writes the files of rendered() to the output directory: stages all
+        files in a staging directory in the output directory and moves the
+        changed files into place only once all are rendered, then removes the
+        files which are no longer rendered. A reload of networkd during a run
+        sees either the old or the new version of every file.
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+        # Staging directories of runs which were killed.
+        for staging in self.path.glob(f"{self.STAGING}*"):
+            if staging.is_dir():
+                self.logger.debug(f"Remove: {staging}")
+                shutil.rmtree(staging, ignore_errors=True)
+        self._manifest = self._read_manifest()
+        self._rendered = {}
+        self._staged = []
+        self.changes = RenderChanges()
+        cache = None
+        if self.render_cache:
+            cache = RenderCache(
+                self.path, template_set_digest(templates), backend=self.backend
+            )
+        self._staging = Path(tempfile.mkdtemp(dir=self.path, prefix=self.STAGING))
+        try:
+            # The files are staged here while the workers render the next ones.
+            for file_name, data in self.rendered(cache):
+                self.write(file_name, data)
+            self._swap()
+        finally:
+            shutil.rmtree(self._staging, ignore_errors=True)
+        if cache is not None:
+            self.logger.debug(f"Render cache hits={cache.hits} misses={cache.misses}")
+            cache.save()
+        self.changes.removed = self._prune()
+        if self._staged or self.changes.removed:
+            self._fsync_directory()
+        self._write_manifest()
+        self.logger.info(self.changes)
+        return self.changes
+
+
+# Environment of a render worker process, see NetworkdProvider.render_units.
+_worker_env: Optional[Environment] = None
+
+
+def _init_render_worker():
+    global _worker_env
+    _worker_env = NetworkdProvider.environment()
+
+
+def render_unit(unit: Unit, backend: str = "jinja") -> str:
+    _, template_name, variables = unit
+    if backend == "native":
+        from .emitter import EMITTERS
+
+        return EMITTERS[template_name](**variables)
+    assert _worker_env is not None
+    return _worker_env.get_template(template_name).render(**variables)
 
 
 if __name__ == "__main__":
@@ -21,15 +21,21 @@
 import logging
 from pathlib import Path
 import subprocess
-import time
+from functools import cache, partial
+from typing import TYPE_CHECKING, Any, Callable, Optional
 
-from jinja2 import Environment
-
-from netplanner.loader.templates import ImportLibLoader
 from netplanner.sriov import templates
 
 from ..config import NetplannerConfig
+from ..interfaces.l2.ethernet import Ethernet
 from . import pci
+from .executor import run_per_device
+
+# rebind lives in its own module so that it can be run without this one.
+from .rebind import REBIND_TIMEOUT, rebind, wait_for_link_aggregation
+
+if TYPE_CHECKING:
+    from jinja2 import Environment
 
 
 SERVICE_PATH = Path("/run/systemd/system/netplanner-delayed-rebind.service")
@@ -38,22 +44,77 @@ LINK_PATH = Path(
 )
 
 
-template_env = Environment(loader=ImportLibLoader(templates))
-
-
-def config(configuration: NetplannerConfig, queue_rebind: bool = False):
-    """Configure SR-IOV VF's with configuration from interfaces.yaml"""
-
-    delayed_bindings = []
+@cache
+def template_env() -> "Environment":
+    # Jinja is only needed when a delayed rebind has to be set up.
+    from netplanner.loader.templates import template_environment
+
+    return template_environment(templates)
+
+
+def configure_device(
+    device: pci.PCINetDevice,
+    interface_config: Ethernet,
+    workers: int = 1,
+    numvfs: Optional[int] = None,
+    devices: Optional[pci.PCINetDevices] = None,
+):
+    """Configure the VF's of a single SR-IOV PF
+
+    numvfs overrides the virtual_function_count of interface_config, which
+    is not modified, e.g. when it exceeds the VFs the PF supports. The
+    entries of device in the inventory devices are refreshed once it is
+    written to.
+    """
+    if numvfs is None:
+        numvfs = int(interface_config.virtual_function_count or 0)
+    logging.info(
+        "Configuring SR-IOV device {} with {} "
+        "VF's".format(
+            device.interface_name,
+            numvfs,
+        )
+    )
+    device.set_sriov_numvfs(numvfs)
+    if interface_config.embedded_switch_mode is not None:
+        device.set_eswitch_mode(interface_config.embedded_switch_mode.value)
+    if devices is not None:
+        devices.update_device(device)
+    if not interface_config.delay_virtual_functions_rebind:
+        device.bind_vfs(
+            driver=interface_config.virtual_function_driver, workers=workers
+        )
+
+
+def config(
+    configuration: NetplannerConfig,
+    queue_rebind: bool = False,
+    workers: int = 1,
+    only: Optional[set[str]] = None,
+    devices: Optional[pci.PCINetDevices] = None,
+):
+    """Configure SR-IOV VF's with configuration from interfaces.yaml
+
+    PFs are independent of each other and are configured by up to
+    workers threads at the same time. If only is given, just the PFs with
+    a matching configured name, interface name or PCI address are
+    configured. A long-running caller may pass its own, up to date,
+    inventory as devices.
+    """
+
+    delayed_bindings = {}
+    tasks: dict[str, Callable[[], Any]] = {}
+    matched: set[str] = set()
+    # A single inventory snapshot is shared by all PFs, only the PFs which are
+    # written to are refreshed afterwards.
 
     for interface_name in configuration.network.ethernets:
         interface_config = configuration.network.ethernets[interface_name]
         if interface_config.virtual_function_count is None:
             continue
-        devices = pci.PCINetDevices()
-        for device in devices.pci_devices:
-            device.update_attributes()
-        logging.info([device.interface_name for device in devices.pci_devices])
+        if devices is None:
+            devices = pci.PCINetDevices()
+            logging.info([device.interface_name for device in devices.pci_devices])
         device = None
         if match := interface_config.match:
             if match.macaddress:
@@ -64,9 +125,18 @@ def config(configuration: NetplannerConfig, queue_rebind: bool = False):
             device = devices.get_device_from_interface_name(interface_name)
         if device and device.sriov:
             if interface_config.delay_virtual_functions_rebind:
-                delayed_bindings.append(device)
-
-            if interface_config.virtual_function_count > device.sriov_totalvfs:
+                delayed_bindings[interface_name] = (
+                    device,
+                    interface_config.virtual_function_driver,
+                )
+            if only is not None:
+                names = {interface_name, device.interface_name, device.pci_address}
+                if only.isdisjoint(names):
+                    continue
+                matched |= only & names
+
+            numvfs = int(interface_config.virtual_function_count)
+            if numvfs > device.sriov_totalvfs:
                 logging.warning(
                     "Requested value for sriov_numfs ({}) too "
                     "high for interface {}. Falling back to "
@@ -77,27 +147,40 @@ def config(configuration: NetplannerConfig, queue_rebind: bool = False):
                         device.sriov_totalvfs,
                     )
                 )
-                interface_config.virtual_function_count = device.sriov_totalvfs
-
-            logging.info(
-                "Configuring SR-IOV device {} with {} "
-                "VF's".format(
-                    device.interface_name,
-                    interface_config.virtual_function_count,
-                )
+                # The configuration may be shared, e.g. by the daemon.
+                numvfs = device.sriov_totalvfs
+
+            tasks[interface_name] = partial(
+                configure_device,
+                device,
+                interface_config,
+                workers=workers,
+                numvfs=numvfs,
+                devices=devices,
             )
-            device.set_sriov_numvfs(interface_config.virtual_function_count)
-            if interface_config.embedded_switch_mode is not None:
-                device.set_eswitch_mode(interface_config.embedded_switch_mode.value)
-            if not interface_config.delay_virtual_functions_rebind:
-                device.bind_vfs()
 
-    if len(delayed_bindings) > 0:
+    if only is not None and only - matched:
+        # e.g. the kernel name of a PF at add time, before it is renamed.
+        logging.warning(
+            f"No configured SR-IOV PF matches {', '.join(sorted(only - matched))}"
+        )
+
+    errors = run_per_device(tasks, workers=workers)
+    failed = [name for name, error in errors.items() if error is not None]
+    delayed_devices = []
+    # The PFs are rebound by one netplanner rebind per VF driver.
+    rebinds: dict[Optional[str], list[pci.PCINetDevice]] = {}
+    for name, (device, driver) in delayed_bindings.items():
+        if name not in failed:
+            delayed_devices.append(device)
+            rebinds.setdefault(driver, []).append(device)
+
+    if len(delayed_devices) > 0:
         with SERVICE_PATH.open("w") as file:
             file.write(
-                template_env.get_template("netplanner-delayed-rebind.j2").render(
-                    devices=delayed_bindings
-                )
+                template_env()
+                .get_template("netplanner-delayed-rebind.j2")
+                .render(devices=delayed_devices, rebinds=rebinds)
             )
         LINK_PATH.parent.mkdir(parents=True, exist_ok=True)
         if not LINK_PATH.exists():
@@ -112,18 +195,5 @@ def config(configuration: NetplannerConfig, queue_rebind: bool = False):
                     ]
                 )
 
-
-def rebind(pci_addresses: list[str]):
-    for pci_address in pci_addresses:
-        device = pci.PCIDevice(pci_address)
-        # We always wait for link_aggregation_state to become active because
-        # delayed rebind is only used for this very specific case anyway
-        while device.link_aggregation_state != "active":
-            logging.warning(
-                "Waiting for lag state of device {} to become active".format(
-                    pci_address
-                )
-            )
-            time.sleep(1)
-        device.sriov_drivers_autoprobe = True
-        pci.bind_vfs(device.vfs)
+    if failed:
+        raise Exception(f"SR-IOV configuration failed for {', '.join(failed)}")
@@ -0,0 +1,107 @@
+# netplanner
+# Copyright (C) 2021-2023 Deutsche Telekom AG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+
+class BufferedLogs(logging.Filter):
+    """Holds back log records of capturing threads instead of emitting them"""
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._buffers: dict[int, list[logging.LogRecord]] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        with self._lock:
+            buffer = self._buffers.get(threading.get_ident())
+            if buffer is None:
+                return True
+            # A record passes every root handler, keep it only once.
+            if not buffer or buffer[-1] is not record:
+                buffer.append(record)
+            return False
+
+    @contextmanager
+    def capture(self) -> Iterator[list[logging.LogRecord]]:
+        records: list[logging.LogRecord] = []
+        with self._lock:
+            self._buffers[threading.get_ident()] = records
+        try:
+            yield records
+        finally:
+            with self._lock:
+                del self._buffers[threading.get_ident()]
+
+    @contextmanager
+    def installed(self) -> Iterator["BufferedLogs"]:
+        handlers = list(logging.getLogger().handlers)
+        for handler in handlers:
+            handler.addFilter(self)
+        try:
+            yield self
+        finally:
+            for handler in handlers:
+                handler.removeFilter(self)
+
+    @staticmethod
+    def emit(records: list[logging.LogRecord]):
+        for record in records:
+            logging.getLogger(record.name).handle(record)
+
+
+def run_per_device(
+    tasks: dict[str, Callable[[], Any]], workers: int = 1
+) -> dict[str, Optional[Exception]]:
+    """Run one task per device in a bounded thread pool
+
+    Log records of a task are emitted in task order once it has finished,
+    so the output of different devices never interleaves. A failing task
+    does not affect the others.
+
+    :param tasks: callables keyed by device name
+    :type: dict[str, Callable]
+    :param workers: maximum number of concurrently running tasks
+    :type: int
+    :returns: the exception of every device, None if it succeeded
+    :rtype: dict[str, Optional[Exception]]
+    """
+    buffered_logs = BufferedLogs()
+
+    def run(name: str, task: Callable[[], Any]):
+        with buffered_logs.capture() as records:
+            try:
+                task()
+                error = None
+            except Exception as e:
+                logging.error(f"Configuring {name} failed: {e}")
+                error = e
+        return records, error
+
+    errors: dict[str, Optional[Exception]] = {}
+    with buffered_logs.installed():
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = {
+                name: executor.submit(run, name, task) for name, task in tasks.items()
+            }
+            for name, future in futures.items():
+                records, errors[name] = future.result()
+                BufferedLogs.emit(records)
+    return errors
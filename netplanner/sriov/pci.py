@@ -22,13 +22,20 @@ import logging
 import json
 import glob
 import os
-import shlex
 import subprocess
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional
 import typing
 
+SYSFS_ROOT = "/sys"
+# PCI base class 0x02 (network controller), subclass 0x00 (Ethernet controller)
+PCI_CLASS_ETHERNET = 0x0200
+DEFAULT_VF_DRIVER = "mlx5_core"
+
 
 # PCIDevice class originates from mlnx_switchdev_mode/sriovify.py
 # Copyright 2019 Canonical Ltd, Apache License, Version 2.0
@@ -202,32 +209,142 @@ class PCIDevice(object):
         return self.pci_addr
 
 
-def bind_vfs(vfs: typing.Iterable[PCIDevice]):
-    """Bind unbound VFs to mlx5_core driver."""
-    bound_vfs = []
-    for vf in vfs:
-        if not vf.bound:
-            logging.info(f"Binding {vf.pci_addr} to mlx5_core")
-            with open("/sys/bus/pci/drivers/mlx5_core/bind", "wt") as f:
-                f.write(vf.pci_addr)
-                bound_vfs.append(vf)
-    return bound_vfs
+class DriverBinder(object):
+    """Batched binding of PCI devices to kernel drivers
 
+    The bind/unbind files of every driver are opened once per thread and
+    reused for all devices, kernfs serialises the writes to one open file.
+    The latency of every bind is recorded in latencies.
+    """
 
-def unbind_vfs(vfs: typing.Iterable[PCIDevice]) -> typing.Iterable[PCIDevice]:
-    """Unbind bound VFs from mlx5_core driver."""
-    unbound_vfs = []
-    for vf in vfs:
-        if vf.bound:
-            with open(
-                "/sys/bus/pci/drivers/mlx5_core/unbind",
-                "wt",
-            ) as f:
-                f.write(vf.pci_addr)
-                unbound_vfs.append(vf)
+    def __init__(self, sysfs_root: str = SYSFS_ROOT):
+        self.sysfs_root = sysfs_root
+        self.latencies: dict[str, float] = {}
+        self._fds: list[int] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "DriverBinder":
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            for fd in self._fds:
+                os.close(fd)
+            self._fds.clear()
+            self._local = threading.local()
+
+    def _driver_file(self, driver: str, action: str) -> int:
+        path = os.path.join(self.sysfs_root, "bus", "pci", "drivers", driver, action)
+        fds = self._local.__dict__.setdefault("fds", {})
+        if path not in fds:
+            fds[path] = os.open(path, os.O_WRONLY)
+            with self._lock:
+                self._fds.append(fds[path])
+        return fds[path]
+
+    def set_driver_override(self, device: PCIDevice, driver: str):
+        """Restrict the drivers which may bind to the device to driver"""
+        with open(device.subpath("driver_override"), "wt") as f:
+            f.write(driver)
+
+    def bind(
+        self, device: PCIDevice, driver: str = DEFAULT_VF_DRIVER, override=False
+    ) -> float:
+        """Bind device to driver
+
+        :param device: device to bind
+        :type: PCIDevice
+        :param driver: kernel driver to bind to
+        :type: str
+        :param override: set driver_override before binding
+        :type: bool
+        :returns: seconds the driver took to probe the device
+        :rtype: float
+        """
+        if override:
+            self.set_driver_override(device, driver)
+        fd = self._driver_file(driver, "bind")
+        start = time.monotonic()
+        os.write(fd, device.pci_addr.encode())
+        latency = time.monotonic() - start
+        self.latencies[device.pci_addr] = latency
+        logging.debug(f"Bound {device.pci_addr} to {driver} in {latency * 1000:.1f}ms")
+        return latency
+
+    def unbind(self, device: PCIDevice) -> bool:
+        """Unbind device from its current driver
+
+        :returns: whether the device was bound
+        :rtype: bool
+        """
+        driver = device.driver
+        if not driver:
+            return False
+        os.write(self._driver_file(driver, "unbind"), device.pci_addr.encode())
+        return True
+
+
+def bind_vfs(
+    vfs: typing.Iterable[PCIDevice],
+    driver: Optional[str] = None,
+    workers: int = 1,
+) -> list[PCIDevice]:
+    """Bind VFs to their driver.
+
+    Without driver, unbound VFs are bound to mlx5_core. With driver, VFs
+    bound to another driver, e.g. autoprobed to mlx5_core when numvfs was
+    set, are unbound first and every VF is bound via driver_override.
+
+    :param vfs: VFs to bind
+    :type: Iterable[PCIDevice]
+    :param driver: driver to bind to via driver_override, mlx5_core if None
+    :type: Optional[str]
+    :param workers: number of VFs probed in parallel
+    :type: int
+    :returns: bound VFs
+    :rtype: list[PCIDevice]
+    """
+    target = driver or DEFAULT_VF_DRIVER
+    if driver is None:
+        unbound_vfs = [vf for vf in vfs if not vf.bound]
+    else:
+        unbound_vfs = [vf for vf in vfs if vf.driver != driver]
+    if not unbound_vfs:
+        return []
+    with DriverBinder() as binder:
+
+        def bind(vf: PCIDevice):
+            if driver is not None and vf.bound:
+                logging.info(f"Unbinding {vf.pci_addr} from {vf.driver}")
+                binder.unbind(vf)
+            logging.info(f"Binding {vf.pci_addr} to {target}")
+            binder.bind(vf, driver=target, override=driver is not None)
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            list(executor.map(bind, unbound_vfs))
+        slowest = max(binder.latencies, key=binder.latencies.__getitem__)
+        logging.info(
+            "Bound {} VFs to {} in {:.1f}ms total, slowest {} {:.1f}ms".format(
+                len(unbound_vfs),
+                target,
+                sum(binder.latencies.values()) * 1000,
+                slowest,
+                binder.latencies[slowest] * 1000,
+            )
+        )
     return unbound_vfs
 
 
+def unbind_vfs(vfs: typing.Iterable[PCIDevice]) -> typing.Iterable[PCIDevice]:
+    """Unbind bound VFs from their driver."""
+    with DriverBinder() as binder:
+        return [vf for vf in vfs if binder.unbind(vf)]
+
+
 def format_pci_addr(pci_addr: str) -> str:
     """Format a PCI address with 0 fill for parts
 
@@ -241,7 +358,40 @@ def format_pci_addr(pci_addr: str) -> str:
     return "{}:{}:{}.{}".format(domain.zfill(4), bus.zfill(2), slot.zfill(2), func)
 
 
-def get_sysnet_interfaces_and_macs() -> list:
+def _is_representor(sysdir: str) -> bool:
+    phys_port_name = Path(sysdir) / "phys_port_name"
+    try:
+        return phys_port_name.exists() and not re.search(
+            r"^p\d+$", phys_port_name.read_text()
+        )
+    except:
+        return False
+
+
+def get_sysnet_device(sysdir: str, pci_address: str) -> dict:
+    """Read interface information of a single device
+
+    :param: sysdir: path to device /sys/class/net directory
+    :type: str
+    :param: pci_address: PCI address of the device
+    :type: str
+    :returns: dict with the details described in get_sysnet_interfaces_and_macs
+    :rtype: dict
+    """
+    device = {
+        "interface": get_sysnet_interface(sysdir),
+        "mac_address": get_sysnet_mac(sysdir),
+        "pci_address": pci_address,
+        "state": get_sysnet_device_state(sysdir),
+        "sriov": is_sriov(sysdir),
+    }
+    if device["sriov"]:
+        device["sriov_totalvfs"] = get_sriov_totalvfs(sysdir)
+        device["sriov_numvfs"] = get_sriov_numvfs(sysdir)
+    return device
+
+
+def get_sysnet_interfaces_and_macs(sysfs_root: str = SYSFS_ROOT) -> list:
     """Catalog interface information from local system
 
     each device dict contains:
@@ -255,21 +405,17 @@ def get_sysnet_interfaces_and_macs() -> list:
         sriov_totalvfs: Total VF capacity of device
         sriov_numvfs: Configured VF capacity of device
 
+    :param: sysfs_root: mount point of sysfs
+    :type: str
     :returns: array of dict objects containing details of each interface
     :rtype: list
     """
     net_devs = []
-    for sdir in glob.glob("/sys/class/net/*"):
+    for sdir in glob.glob(os.path.join(sysfs_root, "class", "net", "*")):
         sym_link = Path(sdir) / "device"
         # Ignore representor interfaces
-        phys_port_name = Path(sdir) / "phys_port_name"
-        try:
-            if phys_port_name.exists() and not re.search(
-                r"^p\d+$", phys_port_name.read_text()
-            ):
-                continue
-        except:
-            pass
+        if _is_representor(sdir):
+            continue
         if sym_link.is_symlink():
             fq_path = sym_link.resolve()
             path = fq_path.parts
@@ -277,21 +423,38 @@ def get_sysnet_interfaces_and_macs() -> list:
                 pci_address = path[-2]
             else:
                 pci_address = path[-1]
-            device = {
-                "interface": get_sysnet_interface(sdir),
-                "mac_address": get_sysnet_mac(sdir),
-                "pci_address": pci_address,
-                "state": get_sysnet_device_state(sdir),
-                "sriov": is_sriov(sdir),
-            }
-            if device["sriov"]:
-                device["sriov_totalvfs"] = get_sriov_totalvfs(sdir)
-                device["sriov_numvfs"] = get_sriov_numvfs(sdir)
-            net_devs.append(device)
+            net_devs.append(get_sysnet_device(sdir, pci_address))
 
     return net_devs
 
 
+def get_sysnet_interface_of_pci_address(
+    pci_address: str, sysfs_root: str = SYSFS_ROOT
+) -> Optional[dict]:
+    """Read interface information of the net device backed by one PCI device
+
+    Only the sysfs entries of the given PCI device are read.
+
+    :param: pci_address: PCI address of the device
+    :type: str
+    :param: sysfs_root: mount point of sysfs
+    :type: str
+    :returns: dict with the details described in get_sysnet_interfaces_and_macs
+    :rtype: Optional[dict]
+    """
+    device = None
+    device_path = Path(sysfs_root) / "bus" / "pci" / "devices" / pci_address
+    for net_path in sorted(
+        glob.glob(str(device_path / "net" / "*"))
+        + glob.glob(str(device_path / "virtio*" / "net" / "*"))
+    ):
+        sdir = str(Path(sysfs_root) / "class" / "net" / Path(net_path).name)
+        if _is_representor(sdir):
+            continue
+        device = get_sysnet_device(sdir, pci_address)
+    return device
+
+
 def get_sysnet_mac(sysdir: str) -> str:
     """Determine MAC address for a device
 
@@ -363,19 +526,28 @@ def get_sysnet_interface(sysdir):
     return Path(sysdir).parts[-1]
 
 
-def get_pci_ethernet_addresses() -> list:
+def get_pci_ethernet_addresses(sysfs_root: str = SYSFS_ROOT) -> list:
     """Generate list of PCI addresses for all network adapters
 
+    Reads the class of every device in /sys/bus/pci/devices and selects
+    Ethernet controllers (class 0x0200xx).
+
+    :param: sysfs_root: mount point of sysfs
+    :type: str
     :returns: list of PCI addresses
     :rtype: list
     """
-    cmd = ["lspci", "-m", "-D"]
-    lspci_output = subprocess.check_output(cmd).decode("UTF-8")
     pci_addresses = []
-    for line in lspci_output.split("\n"):
-        columns = shlex.split(line)
-        if len(columns) > 1 and columns[1] == "Ethernet controller":
-            pci_address = columns[0]
+    for class_file in sorted(
+        glob.glob(os.path.join(sysfs_root, "bus", "pci", "devices", "*", "class"))
+    ):
+        try:
+            with open(class_file, "r") as f:
+                pci_class = int(f.read().strip(), 16)
+        except (OSError, ValueError):
+            continue
+        if pci_class >> 8 == PCI_CLASS_ETHERNET:
+            pci_address = os.path.basename(os.path.dirname(class_file))
             pci_addresses.append(format_pci_addr(pci_address))
     return pci_addresses
 
@@ -384,7 +556,16 @@ def get_pci_ethernet_addresses() -> list:
 # Copyright 2019 Canonical Ltd, Apache License, Version 2.0
 # https://github.com/openstack-charmers/sriov-netplan-shim
 class PCINetDevice(object):
-    def __init__(self, pci_address):
+    def __init__(self, pci_address, net_device=None):
+        """Initialise a PCI net device
+
+        :param pci_address: PCI address of device
+        :type: str
+        :param net_device: interface information from an inventory snapshot,
+                           empty if the device has no net interface,
+                           sysfs is only read for this device if omitted
+        :type: Optional[dict]
+        """
         self.pci_address = pci_address
         self.interface_name = None
         self.mac_address = None
@@ -393,22 +574,27 @@ class PCINetDevice(object):
         self.sriov_totalvfs = None
         self.sriov_numvfs = None
         self.pci_device = PCIDevice(self.pci_address)
-        self.update_attributes()
+        if net_device is None:
+            self.update_attributes()
+        elif net_device:
+            self._set_interface_info(net_device)
 
     def update_attributes(self):
         self.update_interface_info()
 
     def update_interface_info(self):
-        net_devices = get_sysnet_interfaces_and_macs()
-        for interface in net_devices:
-            if self.pci_address == interface["pci_address"]:
-                self.interface_name = interface["interface"]
-                self.mac_address = interface["mac_address"]
-                self.state = interface["state"]
-                self.sriov = interface["sriov"]
-                if self.sriov:
-                    self.sriov_totalvfs = interface["sriov_totalvfs"]
-                    self.sriov_numvfs = interface["sriov_numvfs"]
+        interface = get_sysnet_interface_of_pci_address(self.pci_address)
+        if interface is not None:
+            self._set_interface_info(interface)
+
+    def _set_interface_info(self, interface: dict):
+        self.interface_name = interface["interface"]
+        self.mac_address = interface["mac_address"]
+        self.state = interface["state"]
+        self.sriov = interface["sriov"]
+        if self.sriov:
+            self.sriov_totalvfs = interface["sriov_totalvfs"]
+            self.sriov_numvfs = interface["sriov_numvfs"]
 
     def _set_sriov_numvfs(self, numvfs: int):
         sdevice = (
@@ -444,18 +630,61 @@ class PCINetDevice(object):
                 pass
             self.update_attributes()
 
-    def bind_vfs(self):
+    def bind_vfs(self, driver: Optional[str] = None, workers: int = 1):
         self.pci_device.sriov_drivers_autoprobe = True
-        bind_vfs(self.pci_device.vfs)
+        bind_vfs(self.pci_device.vfs, driver=driver, workers=workers)
 
 
 class PCINetDevices(object):
+    """Inventory of all PCI net devices built from a single sysfs pass"""
+
     def __init__(self):
-        self.pci_devices = [PCINetDevice(dev) for dev in get_pci_ethernet_addresses()]
+        net_devices = {
+            net_device["pci_address"]: net_device
+            for net_device in get_sysnet_interfaces_and_macs()
+        }
+        self.pci_devices = [
+            PCINetDevice(dev, net_devices.get(dev, {}))
+            for dev in get_pci_ethernet_addresses()
+        ]
+        # Devices are updated by the threads which configure them.
+        self._lock = threading.Lock()
+        self._index()
+
+    def _index(self):
+        by_mac: dict[str, PCINetDevice] = {}
+        by_pci_address: dict[str, PCINetDevice] = {}
+        by_interface_name: dict[str, PCINetDevice] = {}
+        # Reversed so that the first device wins, like the former linear scans.
+        for pcidev in reversed(self.pci_devices):
+            if pcidev.mac_address is not None:
+                by_mac[pcidev.mac_address] = pcidev
+            if pcidev.interface_name is not None:
+                by_interface_name[pcidev.interface_name] = pcidev
+            by_pci_address[pcidev.pci_address] = pcidev
+        # Lookups of other threads see either the old or the new indexes.
+        self._by_mac = by_mac
+        self._by_pci_address = by_pci_address
+        self._by_interface_name = by_interface_name
 
     def update_devices(self):
-        for pcidev in self.pci_devices:
+        with self._lock:
+            for pcidev in self.pci_devices:
+                pcidev.update_attributes()
+            self._index()
+
+    def update_device(self, pcidev: PCINetDevice):
+        """Refresh only the given device and re-index the inventory
+
+        The MAC address and interface name of a PF may change when its
+        VFs or its eswitch mode are changed.
+
+        :param pcidev: device of this inventory which was written to
+        :type: PCINetDevice
+        """
+        with self._lock:
             pcidev.update_attributes()
+            self._index()
 
     def get_macs(self) -> list:
         macs = []
@@ -465,21 +694,12 @@ class PCINetDevices(object):
         return macs
 
     def get_device_from_mac(self, mac: str) -> Optional[PCINetDevice]:
-        for pcidev in self.pci_devices:
-            if pcidev.mac_address == mac:
-                return pcidev
-        return None
+        return self._by_mac.get(mac)
 
     def get_device_from_pci_address(self, pci_addr: str) -> Optional[PCINetDevice]:
-        for pcidev in self.pci_devices:
-            if pcidev.pci_address == pci_addr:
-                return pcidev
-        return None
+        return self._by_pci_address.get(pci_addr)
 
     def get_device_from_interface_name(
         self, interface_name: str
     ) -> Optional[PCINetDevice]:
-        for pcidev in self.pci_devices:
-            if pcidev.interface_name == interface_name:
-                return pcidev
-        return None
+        return self._by_interface_name.get(interface_name)
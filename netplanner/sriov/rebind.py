@@ -0,0 +1,114 @@
+# netplanner
+# Copyright (C) 2021-2023 Deutsche Telekom AG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+import time
+from functools import partial
+from typing import Optional
+
+from . import pci
+from .executor import run_per_device
+
+REBIND_TIMEOUT = 600.0
+REBIND_INITIAL_INTERVAL = 0.1
+REBIND_MAX_INTERVAL = 2.0
+
+
+def wait_for_link_aggregation(
+    device: pci.PCIDevice,
+    timeout: float = REBIND_TIMEOUT,
+    interval: float = REBIND_INITIAL_INTERVAL,
+) -> float:
+    """Wait with exponential backoff until the LAG of a PF becomes active
+
+    debugfs does not emit inotify events, so the state file is polled.
+    Only transient read errors are retried, a missing or unreadable state
+    file fails at once.
+
+    :param device: PF to wait for
+    :type: PCIDevice
+    :param timeout: seconds after which waiting is given up
+    :type: float
+    :param interval: initial seconds between two polls
+    :type: float
+    :returns: seconds waited
+    :rtype: float
+    """
+    start = time.monotonic()
+    while True:
+        try:
+            state = device.link_aggregation_state
+        except (FileNotFoundError, PermissionError):
+            # Not an mlx5 PF or debugfs is not mounted, the LAG never shows up.
+            raise
+        except OSError:
+            state = "unknown"
+        waited = time.monotonic() - start
+        if state == "active":
+            return waited
+        if waited >= timeout:
+            raise TimeoutError(
+                "lag state of device {} did not become active within {}s".format(
+                    device.pci_addr, timeout
+                )
+            )
+        logging.warning(
+            "Waiting for lag state of device {} to become active".format(
+                device.pci_addr
+            )
+        )
+        time.sleep(min(interval, timeout - waited))
+        interval = min(interval * 2, REBIND_MAX_INTERVAL)
+
+
+def rebind(
+    pci_addresses: list[str],
+    timeout: float = REBIND_TIMEOUT,
+    driver: Optional[str] = None,
+):
+    """Bind the VFs of every PF to driver as soon as its LAG becomes active
+
+    All PFs are waited for at the same time, each with its own deadline.
+    """
+    waited: dict[str, float] = {}
+
+    def rebind_device(pci_address: str):
+        device = pci.PCIDevice(pci_address)
+        # We always wait for link_aggregation_state to become active because
+        # delayed rebind is only used for this very specific case anyway
+        waited[pci_address] = wait_for_link_aggregation(device, timeout=timeout)
+        device.sriov_drivers_autoprobe = True
+        pci.bind_vfs(device.vfs, driver=driver)
+
+    errors = run_per_device(
+        {
+            pci_address: partial(rebind_device, pci_address)
+            for pci_address in pci_addresses
+        },
+        workers=len(pci_addresses),
+    )
+    for pci_address, error in errors.items():
+        if error is None:
+            logging.info(
+                "Rebound device {} after waiting {:.1f}s for lag".format(
+                    pci_address, waited[pci_address]
+                )
+            )
+        else:
+            logging.error("Rebinding device {} failed: {}".format(pci_address, error))
+    failed = [pci_address for pci_address, error in errors.items() if error]
+    if failed:
+        raise Exception(f"SR-IOV rebind failed for {', '.join(failed)}")
@@ -0,0 +1,97 @@
+# netplanner
+# Copyright (C) 2021-2023 Deutsche Telekom AG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import fcntl
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+TRIGGER_PATH = Path("/run/netplanner/sriov-triggers")
+LOCK_PATH = Path("/run/netplanner/sriov.lock")
+DEBOUNCE = 2.0
+
+
+def _try_lock(fd: int) -> bool:
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except BlockingIOError:
+        return False
+
+
+def _drain(trigger_path: Path) -> set[str]:
+    devices = set()
+    for trigger in trigger_path.iterdir():
+        devices.add(trigger.name)
+        trigger.unlink(missing_ok=True)
+    return devices
+
+
+def coalesce(
+    device: str,
+    run: Callable[[set[str]], None],
+    debounce: Optional[float] = None,
+    trigger_path: Optional[Path] = None,
+    lock_path: Optional[Path] = None,
+) -> bool:
+    """Coalesce concurrent udev triggers for SR-IOV PFs into single passes
+
+    The device is queued in trigger_path. Whoever holds the lock waits for
+    the debounce window and then runs once for all queued devices, any
+    other invocation returns right after queueing.
+
+    :param device: PCI address, as passed by the udev rule, or interface name of the triggering PF
+    :type: str
+    :param run: called with the set of queued devices
+    :type: Callable[[set[str]], None]
+    :param debounce: seconds to wait for further triggers, DEBOUNCE by default
+    :type: Optional[float]
+    :param trigger_path: directory of the queued devices, TRIGGER_PATH by default
+    :type: Optional[Path]
+    :param lock_path: lock held by the running invocation, LOCK_PATH by default
+    :type: Optional[Path]
+    :returns: whether this invocation ran the configuration
+    :rtype: bool
+    """
+    debounce = DEBOUNCE if debounce is None else debounce
+    trigger_path = trigger_path or TRIGGER_PATH
+    lock_path = lock_path or LOCK_PATH
+    trigger_path.mkdir(parents=True, exist_ok=True)
+    (trigger_path / device.replace("/", "_")).touch()
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+    ran = False
+    try:
+        while _try_lock(fd):
+            try:
+                time.sleep(debounce)
+                devices = _drain(trigger_path)
+                if devices:
+                    logging.info(f"Configuring triggered SR-IOV devices {devices}")
+                    run(devices)
+                    ran = True
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            # Triggers queued after the drain but before the unlock found the
+            # lock taken, so they have to be picked up here.
+            if not any(trigger_path.iterdir()):
+                break
+        if not ran:
+            logging.info(f"SR-IOV trigger for {device} is handled by another run")
+    finally:
+        os.close(fd)
+    return ran
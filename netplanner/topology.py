@@ -0,0 +1,132 @@
+# netplanner
+# Copyright (C) 2021-2023 Deutsche Telekom AG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Optional, Union
+
+from .interfaces.l2.bond import Bond
+from .interfaces.l2.bridge import Bridge
+from .interfaces.l2.dummy import Dummy
+from .interfaces.l2.ethernet import Ethernet
+from .interfaces.l2.veth import Veth
+from .interfaces.l2.vlan import VLAN
+from .interfaces.l2.vrf import VRF
+from .interfaces.l2.vxlan import VXLAN
+
+if TYPE_CHECKING:
+    from .config import NetworkConfig
+
+Interface = Union[Dummy, Ethernet, Bridge, VXLAN, Bond, VLAN, VRF, Veth]
+
+
+@dataclass(slots=True)
+class Node:
+    name: str
+    kind: str
+    config: Interface
+    parents: dict[str, Interface] = field(default_factory=dict)
+    children: dict[str, Interface] = field(default_factory=dict)
+
+
+class Topology:
+    """
+    Index of all interfaces and their parent/child relations.
+
+    It is built once from a validated NetworkConfig, so that the
+    relations of an interface can be queried in O(1):
+
+    * Ethernet -> Bond (bond interfaces)
+    * Bond, VXLAN -> Bridge (bridge interfaces)
+    * VLAN -> its link
+    * Bond -> VLANs, Dummy -> VXLANs, Bridge -> VXLANs (children)
+    """
+
+    KINDS = [
+        "dummies",
+        "ethernets",
+        "bridges",
+        "vxlans",
+        "bonds",
+        "vlans",
+        "vrfs",
+        "veths",
+    ]
+
+    def __init__(self, network: "NetworkConfig"):
+        self.nodes: dict[str, Node] = {}
+        for kind in self.KINDS:
+            for name, config in getattr(network, kind).items():
+                if name in self.nodes:
+                    raise ValueError(
+                        f"Interface {name} is defined as {self.nodes[name].kind} and {kind}"
+                    )
+                self.nodes[name] = Node(name=name, kind=kind, config=config)
+
+        members: dict[str, list[tuple[str, Union[Bond, Bridge]]]] = {}
+        for masters in (network.bonds, network.bridges):
+            for name, config in masters.items():
+                for member in config.interfaces:
+                    members.setdefault(member, []).append((name, config))
+
+        for name in network.ethernets:
+            self._link_masters(name, members, Bond)
+        for name in network.bonds:
+            self._link_masters(name, members, Bridge)
+        for name, vxlan in network.vxlans.items():
+            self._link_masters(name, members, Bridge)
+            for master_name, master in members.get(name, []):
+                if isinstance(master, Bridge):
+                    self.nodes[master_name].children[name] = vxlan
+            if vxlan.link in self.nodes and isinstance(
+                self.nodes[vxlan.link].config, Dummy
+            ):
+                self.nodes[vxlan.link].children[name] = vxlan
+        for name, vlan in network.vlans.items():
+            if vlan.link in self.nodes:
+                link = self.nodes[vlan.link]
+                self.nodes[name].parents[vlan.link] = link.config
+                if isinstance(link.config, Bond):
+                    link.children[name] = vlan
+
+    def _link_masters(
+        self,
+        name: str,
+        members: dict[str, list[tuple[str, Union[Bond, Bridge]]]],
+        kind: type,
+    ):
+        node = self.nodes[name]
+        for master_name, master in members.get(name, []):
+            if isinstance(master, kind):
+                node.parents[master_name] = master
+        if len(node.parents) > 1:
+            raise ValueError(f"Cannot have more than one parent interface for {name}")
+
+    def parents(self, name: str) -> Optional[dict[str, Interface]]:
+        """Parent interfaces as the networkd templates expect them"""
+        node = self.nodes[name]
+        match node.config:
+            case Bond() | Ethernet() | VXLAN():
+                return node.parents
+            case VLAN() if node.config.link is not None:
+                return node.parents
+        return None
+
+    def children(self, name: str) -> dict[str, Interface]:
+        node = self.nodes[name]
+        match node.config:
+            case Bond() | Dummy() | Bridge():
+                return node.children
+        return {}
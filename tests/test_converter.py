@@ -0,0 +1,85 @@
+# netplanner
+# Copyright (C) 2021-2023 Deutsche Telekom AG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Differential tests of the compiled converter against dacite."""
+
+import copy
+from pathlib import Path
+
+import pytest
+
+from netplanner.config import NetplannerConfig
+from netplanner.interfaces.base import CONVERTER, BaseSerializer
+from netplanner.loader.config import ConfigLoader
+
+EXAMPLES = Path(__file__).resolve().parent.parent / "examples"
+
+
+def both(data: dict):
+    """Parses data with the converter and with dacite, returns both results or errors"""
+    results = []
+    for parse in [
+        lambda data: CONVERTER.from_dict(NetplannerConfig, data),
+        NetplannerConfig.from_dict_reference,
+    ]:
+        streamlined = BaseSerializer.streamline_keys(copy.deepcopy(data))
+        try:
+            results.append(parse(streamlined))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+@pytest.mark.parametrize(
+    "example",
+    [path for path in sorted(EXAMPLES.iterdir()) if path.name != "empty"],
+    ids=lambda path: path.name,
+)
+def test_examples(example: Path):
+    loader = ConfigLoader(str(example))
+    assert loader.load_config() and loader.config is not None
+    converted, reference = both(loader.config)
+    if isinstance(reference, Exception):
+        # Examples which dacite rejects have to be rejected the same way.
+        assert type(converted) is type(reference)
+    else:
+        assert converted == reference
+
+
+def network(**sections) -> dict:
+    return {"network": {"version": 2, **sections}}
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        network(ethernets={"eth0": {"unknown-key": True}}),
+        network(ethernets={"eth0": {"mtu": 5}}),
+        network(ethernets={"eth0": {"mtu": "large"}}),
+        network(ethernets={"eth0": {"addresses": ["10.0.0.300/24"]}}),
+        network(ethernets={"eth0": {"macaddress": "00:11:22"}}),
+        network(ethernets={"eth0": {"link-local": ["ipv5"]}}),
+        network(ethernets={"eth0": {"routes": [{"to": "default", "via": "nowhere"}]}}),
+        network(ethernets="eth0"),
+        network(vlans={"vlan.10": {"link": "eth0"}}),
+        network(vlans={"vlan.1": {"id": 1, "link": "eth0"}}),
+        network(veths={"veth0": {"link": "veth1"}}),
+        {"network": {"ethernets": {}}},
+    ],
+)
+def test_errors(data: dict):
+    converted, reference = both(data)
+    assert isinstance(reference, Exception)
+    assert type(converted) is type(reference)
@@ -0,0 +1,67 @@
+# netplanner
+# Copyright (C) 2021-2023 Deutsche Telekom AG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Tests of requests served by the netplanner daemon."""
+
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from netplanner import client, daemon
+from netplanner.sriov import trigger
+
+EXAMPLE = Path(__file__).resolve().parent.parent / "examples" / "vm-config.yaml"
+
+
+@pytest.fixture
+def server(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(trigger, "TRIGGER_PATH", tmp_path / "triggers")
+    monkeypatch.setattr(trigger, "LOCK_PATH", tmp_path / "sriov.lock")
+    monkeypatch.setattr(trigger, "DEBOUNCE", 0.5)
+    monkeypatch.setattr(daemon.Daemon, "inventory", lambda self, names=(): None)
+    server = daemon.Daemon(socket_path=tmp_path / "netplanner.sock", cache_dir=None)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_sriov_triggers_are_coalesced(server: daemon.Daemon, monkeypatch):
+    passes = []
+    monkeypatch.setattr(
+        daemon, "sriov", lambda configuration, only, **kwargs: passes.append(only)
+    )
+    devices = ["0000:3b:00.0", "0000:3b:00.1", "0000:5e:00.0"]
+
+    def configure(device: str):
+        client.request(
+            "configure",
+            server.socket_path,
+            config=str(EXAMPLE),
+            only_sriov=True,
+            sriov_device=device,
+        )
+
+    threads = [threading.Thread(target=configure, args=[device]) for device in devices]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert passes == [set(devices)]
+    assert time.monotonic() - start < 2 * trigger.DEBOUNCE
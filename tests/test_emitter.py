@@ -0,0 +1,47 @@
+# netplanner
+# Copyright (C) 2021-2023 Deutsche Telekom AG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Golden tests of the native emitter against the Jinja templates."""
+
+from pathlib import Path
+
+import pytest
+
+from netplanner.loader.config import ConfigLoader
+from netplanner.providers.networkd.provider import NetworkdProvider
+
+EXAMPLES = Path(__file__).resolve().parent.parent / "examples"
+
+
+def configuration(path: Path):
+    try:
+        return ConfigLoader(str(path)).load_netplanner_config()
+    except Exception as e:
+        pytest.skip(f"{path.name} is not a valid configuration: {e}")
+
+
+@pytest.mark.parametrize(
+    "example", sorted(EXAMPLES.iterdir()), ids=lambda path: path.name
+)
+def test_backends(example: Path):
+    config = configuration(example)
+    jinja, native = (
+        NetworkdProvider(
+            config=config, local=False, backend=backend
+        ).render_to_mapping()
+        for backend in ["jinja", "native"]
+    )
+    assert jinja
+    assert native == jinja
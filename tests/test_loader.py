@@ -0,0 +1,42 @@
+# netplanner
+# Copyright (C) 2021-2023 Deutsche Telekom AG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Tests of the configuration loader."""
+
+from pathlib import Path
+
+import pytest
+
+from netplanner.loader.config import ConfigLoader
+
+EXAMPLES = Path(__file__).resolve().parent.parent / "examples"
+
+
+@pytest.mark.parametrize("example", ["5g-worker", "vm-config"])
+def test_parallel_parsing(example: str, monkeypatch):
+    parsed: list[Path] = []
+    parse_parallel = ConfigLoader._parse_parallel
+
+    def spy(self: ConfigLoader, paths: list[Path]):
+        parse_parallel(self, paths)
+        parsed.extend(self._parsed)
+
+    monkeypatch.setattr(ConfigLoader, "_parse_parallel", spy)
+    path = str(EXAMPLES / example)
+    sequential = ConfigLoader(path, workers=1).load_netplanner_config()
+    assert not parsed
+    parallel = ConfigLoader(path, workers=2).load_netplanner_config()
+    assert sorted(parsed) == sorted((EXAMPLES / example).iterdir())
+    assert parallel == sequential
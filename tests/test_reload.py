@@ -0,0 +1,112 @@
+# netplanner
+# Copyright (C) 2021-2023 Deutsche Telekom AG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Tests of the networkd reload plan against a fake sysfs."""
+
+from pathlib import Path
+from subprocess import CalledProcessError, CompletedProcess
+
+import pytest
+
+from netplanner.config import NetplannerConfig
+from netplanner.providers.networkd.provider import (
+    NetworkdProvider,
+    ReloadPlan,
+    RenderChanges,
+)
+
+CONFIG = {
+    "network": {
+        "version": 2,
+        "ethernets": {
+            "eth0": {},
+            "uplink": {"match": {"macaddress": "00:11:22:33:44:55"}},
+            "any": {"match": {"name": "en*"}},
+        },
+        "vlans": {
+            "vlan.10": {"id": 10, "link": "eth0"},
+            "vlan.20": {"id": 20, "link": "eth0"},
+        },
+    }
+}
+
+
+@pytest.fixture
+def provider(tmp_path: Path, monkeypatch) -> NetworkdProvider:
+    for name, address in [
+        ("eth0", "00:00:00:00:00:01"),
+        ("ens1f0", "00:11:22:33:44:55"),
+        ("vlan.10", "00:00:00:00:00:01"),
+    ]:
+        link = tmp_path / "class" / "net" / name
+        link.mkdir(parents=True)
+        (link / "address").write_text(f"{address}\n")
+    monkeypatch.setattr(NetworkdProvider, "SYSFS", tmp_path)
+    return NetworkdProvider(
+        config=NetplannerConfig.from_dict(CONFIG),
+        local=False,
+        path=str(tmp_path / "output"),
+    )
+
+
+def test_plan(provider: NetworkdProvider):
+    changes = RenderChanges(
+        changed={
+            "15-vlan.10.netdev",
+            "15-vlan.20.netdev",
+            "10-eth0.network",
+            "10-uplink.link",
+        },
+        removed={"15-vlan.30.network"},
+    )
+    assert provider.plan_reload(changes) == ReloadPlan(
+        reload=True,
+        recreate={"vlan.10"},
+        reconfigure={"eth0"},
+        trigger={"ens1f0"},
+    )
+
+
+@pytest.mark.parametrize(
+    "changes",
+    [
+        RenderChanges(changed={"10-any.link"}),
+        RenderChanges(removed={"10-gone.network"}),
+    ],
+)
+def test_plan_restart(provider: NetworkdProvider, changes: RenderChanges):
+    assert provider.plan_reload(changes).restart
+
+
+def test_apply_skips_missing_links(provider: NetworkdProvider, monkeypatch):
+    commands = []
+
+    def run(command: list[str], check: bool, **kwargs):
+        commands.append(command[1:])
+        if command[1] == "networkctl" and "reconfigure" in command:
+            raise CalledProcessError(
+                1, command, stderr='Failed to resolve interface "eth0": No such device'
+            )
+        return CompletedProcess(command, 0, stdout="", stderr="")
+
+    monkeypatch.setattr("netplanner.providers.networkd.provider.run", run)
+    provider.apply_reload(
+        ReloadPlan(reload=True, recreate={"vlan.10", "vlan.20"}, reconfigure={"eth0"})
+    )
+    assert commands == [
+        ["ip", "link", "delete", "dev", "vlan.10"],
+        ["networkctl", "reload"],
+        ["networkctl", "reconfigure", "eth0"],
+    ]
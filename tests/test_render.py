@@ -0,0 +1,57 @@
+# netplanner
+# Copyright (C) 2021-2023 Deutsche Telekom AG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Tests of the files render() writes into and removes from the output directory."""
+
+from pathlib import Path
+
+from netplanner.config import NetplannerConfig
+from netplanner.providers.networkd.cache import RenderCache
+from netplanner.providers.networkd.provider import NetworkdProvider
+
+
+def provider(path: Path, *names: str) -> NetworkdProvider:
+    config = {"network": {"version": 2, "ethernets": {name: {} for name in names}}}
+    return NetworkdProvider(
+        config=NetplannerConfig.from_dict(config), local=False, path=str(path)
+    )
+
+
+def test_removed_files_are_deleted(tmp_path: Path):
+    first = provider(tmp_path, "eth0", "eth1").render()
+    assert "10-eth1.network" in first.added
+    unmanaged = tmp_path / "10-eth1-local.network"
+    unmanaged.write_text("[Match]\nName=eth1\n")
+
+    changes = provider(tmp_path, "eth0").render()
+    assert changes.removed == {"10-eth1.link", "10-eth1.network"}
+    for file_name in changes.removed:
+        assert not (tmp_path / file_name).exists()
+    assert "10-eth0.network" in changes.unchanged
+    assert unmanaged.exists()
+
+    assert not provider(tmp_path, "eth0").render()
+
+
+def test_render_cache_is_per_backend(tmp_path: Path):
+    unit = ("10-eth0.network", "systemd.network.j2", {"name": "eth0"})
+    jinja = RenderCache(tmp_path, "templates", backend="jinja")
+    jinja.put(jinja.key(*unit), "[Match]\n")
+    jinja.save()
+
+    assert RenderCache(tmp_path, "templates", backend="jinja").get(jinja.key(*unit))
+    native = RenderCache(tmp_path, "templates", backend="native")
+    assert native.key(*unit) != jinja.key(*unit)
+    assert native.get(native.key(*unit)) is None
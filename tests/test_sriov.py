@@ -0,0 +1,104 @@
+# netplanner
+# Copyright (C) 2021-2023 Deutsche Telekom AG
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Tests of the SR-IOV inventory against a fake sysfs."""
+
+from pathlib import Path
+
+from netplanner.sriov import pci
+
+NET_DEVICES = [
+    {
+        "interface": "ens1f0",
+        "mac_address": "00:11:22:33:44:55",
+        "pci_address": "0000:3b:00.0",
+        "state": "up",
+        "sriov": True,
+        "sriov_totalvfs": 8,
+        "sriov_numvfs": 0,
+    },
+]
+
+
+def test_update_device(monkeypatch):
+    monkeypatch.setattr(pci, "get_sysnet_interfaces_and_macs", lambda: NET_DEVICES)
+    monkeypatch.setattr(pci, "get_pci_ethernet_addresses", lambda: ["0000:3b:00.0"])
+    devices = pci.PCINetDevices()
+    device = devices.get_device_from_pci_address("0000:3b:00.0")
+    assert device is devices.get_device_from_mac("00:11:22:33:44:55")
+
+    # e.g. a PF which is renamed and gets another MAC in switchdev mode.
+    renamed = dict(
+        NET_DEVICES[0], interface="ens1f0np0", mac_address="00:11:22:33:44:66"
+    )
+    monkeypatch.setattr(
+        pci, "get_sysnet_interface_of_pci_address", lambda pci_address: renamed
+    )
+    devices.update_device(device)
+    assert devices.get_device_from_interface_name("ens1f0") is None
+    assert devices.get_device_from_mac("00:11:22:33:44:55") is None
+    assert devices.get_device_from_interface_name("ens1f0np0") is device
+    assert devices.get_device_from_mac("00:11:22:33:44:66") is device
+
+
+def fake_sysfs(root: Path) -> Path:
+    """Two Ethernet ports of a PCI device, the first SR-IOV capable, and a bridge"""
+    devices = root / "bus" / "pci" / "devices"
+    for pci_address, pci_class, interface in [
+        ("0000:3b:00.0", "0x020000", "ens1f0"),
+        ("0000:3b:00.1", "0x020000", "ens1f1"),
+        ("0000:00:1f.0", "0x060100", None),
+    ]:
+        device = devices / pci_address
+        device.mkdir(parents=True)
+        (device / "class").write_text(f"{pci_class}\n")
+        if interface is None:
+            continue
+        (device / "net" / interface).mkdir(parents=True)
+        link = root / "class" / "net" / interface
+        link.mkdir(parents=True)
+        (link / "address").write_text(f"00:11:22:33:44:5{pci_address[-1]}\n")
+        (link / "operstate").write_text("up\n")
+        (link / "device").symlink_to(device)
+    (devices / "0000:3b:00.0" / "sriov_totalvfs").write_text("8\n")
+    (devices / "0000:3b:00.0" / "sriov_numvfs").write_text("2\n")
+    (root / "class" / "net" / "lo").mkdir()
+    return root
+
+
+def test_enumeration(tmp_path: Path):
+    root = str(fake_sysfs(tmp_path))
+    assert pci.get_pci_ethernet_addresses(root) == ["0000:3b:00.0", "0000:3b:00.1"]
+    ens1f0 = {
+        "interface": "ens1f0",
+        "mac_address": "00:11:22:33:44:50",
+        "pci_address": "0000:3b:00.0",
+        "state": "up",
+        "sriov": True,
+        "sriov_totalvfs": 8,
+        "sriov_numvfs": 2,
+    }
+    ens1f1 = {
+        "interface": "ens1f1",
+        "mac_address": "00:11:22:33:44:51",
+        "pci_address": "0000:3b:00.1",
+        "state": "up",
+        "sriov": False,
+    }
+    assert sorted(
+        pci.get_sysnet_interfaces_and_macs(root), key=lambda device: device["interface"]
+    ) == [ens1f0, ens1f1]
+    assert pci.get_sysnet_interface_of_pci_address("0000:3b:00.0", root) == ens1f0
+    assert pci.get_sysnet_interface_of_pci_address("0000:00:1f.0", root) is None